@@ -0,0 +1,44 @@
+"""Sprite atlas: the named frames of the image bank, built once.
+
+Every sprite of a kind shares the same Image objects, with their blit
+arguments ready: drawing one is a single px.blt call.
+"""
+
+from constants import GREEN
+from base import Image
+
+# Name -> (u, v, w, h[, colkey]), or a list of them for an animation
+SHEET = {
+    # Game
+    "ship": (0, 0, 9, 7),
+    "life": (0, 19, 7, 5),
+    "title": (0, 32, 84, 40),
+    "bullet": (10, 0, 9, 8),
+    "en_bullet": (96, 0, 5, 5),  # Red, the other colors are 6 pixels below
+    # Enemies
+    "en1": [(19, 0, 11, 11), (32, 0, 11, 11)],
+    "en2": [(76, 0, 9, 9, GREEN), (86, 0, 9, 9, GREEN)],
+    "en3": [(44, 0, 15, 15), (60, 0, 15, 15)],
+    "boss": [(102, 0, 48, 44), (151, 0, 48, 44)],
+    "xrotator": [(20, 12, 11, 11), (32, 12, 11, 11)],
+    "sider": [(76, 10, 9, 9), (86, 10, 9, 9)],
+    "pendulum": [(0, 9, 9, 9, GREEN), (10, 9, 9, 9, GREEN)],
+    "bigboss_close": [(0, 73, 30, 30, GREEN), (31, 73, 30, 30, GREEN)],
+    "bigboss_open": [(0, 104, 30, 30, GREEN), (31, 104, 30, 30, GREEN)],
+    # Ending
+    "big_star": [(44, 16, 11, 11), (56, 16, 7, 11)],
+    "pulse_star_high": [(64, 16, 3, 3), (68, 16, 3, 3)],
+    "pulse_star_low": [(64, 20, 3, 3), (68, 20, 3, 3)],
+    "planet": (195, 39, 61, 61),
+    "moon_front": (218, 0, 37, 37),
+    "moon_back": (200, 0, 16, 16),
+}
+
+
+def build(rect):
+    if isinstance(rect, list):
+        return [build(frame) for frame in rect]
+    return Image(*rect)
+
+
+FRAMES = {name: build(rect) for name, rect in SHEET.items()}
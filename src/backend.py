@@ -0,0 +1,204 @@
+"""Drawing, audio and input backends.
+
+Game modules do `import backend as px` and call the pyxel like functions
+of this module: px.blt, px.play, px.btnp ... They are bound by use() to
+the methods of the backend in use, so a call costs the same as a direct
+pyxel call. Pyxel is the default backend, the null backend runs the game
+headless: no window, no sound and scripted input.
+"""
+
+# Keys, backend independent names
+KEY_LEFT = "left"
+KEY_RIGHT = "right"
+KEY_UP = "up"
+KEY_DOWN = "down"
+KEY_X = "x"
+KEY_P = "p"
+KEY_Q = "q"
+KEY_F1 = "f1"
+
+FUNCTIONS = (
+    # Application
+    "init",
+    "load",
+    "run",
+    "quit",
+    "fullscreen",
+    "mouse",
+    # Draw
+    "camera",
+    "clip",
+    "cls",
+    "pal",
+    "blt",
+    "rect",
+    "circ",
+    "circb",
+    "line",
+    "pset",
+    "text",
+    "image",
+    # Audio
+    "play",
+    "playm",
+    "stop",
+    "set_sound",
+    # Input
+    "btnp",
+)
+
+current = None
+
+
+class NullImage:
+    """Image bank of the null backend, drawing in it does nothing"""
+
+    def cls(self, col):
+        pass
+
+    def rect(self, x, y, w, h, col):
+        pass
+
+    def pset(self, x, y, col):
+        pass
+
+    def text(self, x, y, s, col):
+        pass
+
+    def blt(self, x, y, img, u, v, w, h, colkey=None):
+        pass
+
+
+def use(backend):
+    """Route the module functions to backend"""
+    global current
+    current = backend
+    module = globals()
+    for name in FUNCTIONS:
+        module[name] = getattr(backend, name)
+
+
+class NullBackend:
+    """Backend doing nothing: draws and sounds are dropped.
+
+    Input is scripted : keys in the pressed set are seen as just pressed.
+    run() calls update and draw in a loop until quit() is called.
+    """
+
+    def __init__(self):
+        self.pressed = set()
+        self.running = False
+
+    # Application
+    def init(self, width, height, **kwargs):
+        pass
+
+    def load(self, filename):
+        pass
+
+    def run(self, update, draw):
+        self.running = True
+        while self.running:
+            update()
+            draw()
+
+    def quit(self):
+        self.running = False
+
+    def fullscreen(self, full):
+        pass
+
+    def mouse(self, visible):
+        pass
+
+    # Draw
+    def camera(self, x=None, y=None):
+        pass
+
+    def clip(self, x=None, y=None, w=None, h=None):
+        pass
+
+    def cls(self, col):
+        pass
+
+    def pal(self, col1=None, col2=None):
+        pass
+
+    def blt(self, x, y, img, u, v, w, h, colkey=None):
+        pass
+
+    def rect(self, x, y, w, h, col):
+        pass
+
+    def circ(self, x, y, r, col):
+        pass
+
+    def circb(self, x, y, r, col):
+        pass
+
+    def line(self, x1, y1, x2, y2, col):
+        pass
+
+    def pset(self, x, y, col):
+        pass
+
+    def text(self, x, y, s, col):
+        pass
+
+    def image(self, img):
+        return NullImage()
+
+    # Audio
+    def play(self, ch, snd, loop=False):
+        pass
+
+    def playm(self, msc, loop=False):
+        pass
+
+    def stop(self, ch=None):
+        pass
+
+    def set_sound(self, snd, notes, tones, volumes, effects, speed):
+        pass
+
+    # Input
+    def btnp(self, key, hold=None, period=None):
+        return key in self.pressed
+
+
+class PyxelBackend(NullBackend):
+    """Pyxel window, sound and keyboard"""
+
+    def __init__(self):
+        super().__init__()
+        import pyxel
+
+        self.pyxel = pyxel
+        self.keys = {
+            KEY_LEFT: pyxel.KEY_LEFT,
+            KEY_RIGHT: pyxel.KEY_RIGHT,
+            KEY_UP: pyxel.KEY_UP,
+            KEY_DOWN: pyxel.KEY_DOWN,
+            KEY_X: pyxel.KEY_X,
+            KEY_P: pyxel.KEY_P,
+            KEY_Q: pyxel.KEY_Q,
+            KEY_F1: pyxel.KEY_F1,
+        }
+        # Straight pyxel functions, no extra call
+        for name in FUNCTIONS:
+            if name not in ("set_sound", "btnp"):
+                setattr(self, name, getattr(pyxel, name))
+
+    def set_sound(self, snd, notes, tones, volumes, effects, speed):
+        self.pyxel.sound(snd).set(notes, tones, volumes, effects, speed)
+
+    def btnp(self, key, hold=None, period=None):
+        if hold is None:
+            return self.pyxel.btnp(self.keys[key])
+        return self.pyxel.btnp(self.keys[key], hold, period)
+
+
+try:
+    use(PyxelBackend())
+except ImportError:  # No pyxel, still usable headless
+    use(NullBackend())
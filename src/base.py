@@ -1,34 +1,133 @@
-from time import time
+from clock import now
 from abc import ABC, abstractmethod
 
-import pyxel as px
+import backend as px
 
 from constants import BLACK
-from vector import Vector as v2
+
+
+class Registry:
+    """Collection of game objects with O(1) add and remove.
+
+    Adds and removes made during a frame are only recorded, they are applied
+    by flush() at the frame boundary. The registry can then be iterated
+    while objects spawn or die, without copying it every frame. Iteration
+    skips objects removed since the last flush and yields the pending ones
+    last, up to the ones added while iterating. Removal moves the last object into the freed slot: the order
+    is not the insertion order but it is deterministic.
+    """
+
+    registries = []
+
+    @classmethod
+    def flush_all(cls):
+        for registry in cls.registries:
+            if registry.adding or registry.removing:
+                registry.flush()
+
+    def __init__(self):
+        self.items = []
+        self.index = {}  # Object -> slot in items
+        self.adding = {}  # Pending adds, dicts are used as ordered sets
+        self.removing = {}  # Pending removes
+        self.registries.append(self)
+
+    def add(self, item):
+        if item in self.removing:
+            del self.removing[item]
+        elif item not in self.index:
+            self.adding[item] = None
+
+    def remove(self, item):
+        if item in self.adding:
+            del self.adding[item]
+        elif item in self.index and item not in self.removing:
+            self.removing[item] = None
+        else:
+            raise ValueError(f"{item} not in registry")
+
+    def clear(self):
+        self.adding.clear()
+        self.removing.update(dict.fromkeys(self.items))
+
+    def flush(self):
+        items = self.items
+        index = self.index
+        for item in self.removing:
+            slot = index.pop(item)
+            last = items.pop()
+            if last is not item:
+                items[slot] = last
+                index[last] = slot
+        self.removing.clear()
+        for item in self.adding:
+            index[item] = len(items)
+            items.append(item)
+        self.adding.clear()
+
+    def copy(self):
+        return list(self)
+
+    def __iter__(self):
+        removing = self.removing
+        for item in self.items:
+            if item not in removing:
+                yield item
+        # Objects added meanwhile are yielded too, until no new one comes
+        adding = self.adding
+        yielded = set()
+        pending = list(adding)
+        while pending:
+            for item in pending:
+                if item in adding:
+                    yielded.add(item)
+                    yield item
+            pending = [item for item in adding if item not in yielded]
+
+    def __reversed__(self):
+        removing = self.removing
+        for item in reversed(list(self.adding)):
+            if item in self.adding:
+                yield item
+        for item in reversed(self.items):
+            if item not in removing:
+                yield item
+
+    def __len__(self):
+        return len(self.items) - len(self.removing) + len(self.adding)
+
+    def __contains__(self, item):
+        if item in self.index:
+            return item not in self.removing
+        return item in self.adding
 
 
 class Updatable(ABC):
 
-    updatables = []
+    __slots__ = ()
+    updatables = Registry()
 
     @abstractmethod
     def update(self, dt, t):
         pass
 
     def start_update(self):
-        self.updatables.append(self)
+        self.updatables.add(self)
 
     def stop_update(self):
         self.updatables.remove(self)
 
 
 class Layer:
-    back = []  # Starfield, Hit flash
-    main = []  # Ship, Enemies
-    fore = []  # Bullets, Explosions
+    back = Registry()  # Starfield, Hit flash
+    main = Registry()  # Ship, Enemies
+    fore = Registry()  # Bullets, Explosions
 
 
 class Drawable(ABC):
+
+    __slots__ = ()  # The layer is stored by the concrete classes
+
     @abstractmethod
     def draw(self):
         pass
@@ -40,30 +139,74 @@ class Drawable(ABC):
         self.start_draw()
 
     def start_draw(self):
-        self.layer.append(self)
+        self.layer.add(self)
 
     def stop_draw(self):
         self.layer.remove(self)
 
 
 class Image:
-    def __init__(self, u, v, w, h, bank=0):
+    """Rectangle of an image bank, with what the sprites derive from it.
+    Shared by all the sprites of a kind, see atlas.FRAMES.
+    """
+
+    __slots__ = (
+        "bank",
+        "u",
+        "v",
+        "w",
+        "h",
+        "colkey",
+        "args",
+        "hw",
+        "hh",
+        "radius",
+    )
+
+    def __init__(self, u, v, w, h, colkey=BLACK, bank=0):
         self.bank = bank
         self.u = u
         self.v = v
         self.w = w
         self.h = h
+        self.colkey = colkey
+        self.args = (bank, u, v, w, h, colkey)  # For blt
+        self.hw = w / 2
+        self.hh = h / 2
+        self.radius = (w + h) / 4
 
-    def __iter__(self):
-        return (self.bank, self.u, self.v, self.w, self.h).__iter__()
+
+class Camera:
+    """Offset of the game drawings: screen shake and scroll.
+
+    Applied once around a group of draws with the backend camera, so the
+    draws themselves take raw coordinates.
+    """
+
+    shake_x = shake_y = 0
+    scroll_x = scroll_y = 0
+
+    @classmethod
+    def apply(cls):
+        px.camera(-(cls.shake_x + cls.scroll_x), -(cls.shake_y + cls.scroll_y))
+
+    @classmethod
+    def reset(cls):
+        px.camera()
+
+    @classmethod
+    def clear(cls):
+        cls.shake_x = cls.shake_y = cls.scroll_x = cls.scroll_y = 0
 
 
 class Entity:
-    offset = v2(0, 0)
+
+    __slots__ = ("pos", "center", "radius")
 
     def __init__(self, pos, radius=None):
-        self.pos = pos
-        self.center = pos
+        # Own copy: positions are updated in place (pos += vel * dt)
+        self.pos = pos.copy()
+        self.center = self.pos
         self.radius = radius
 
     def collide_with(self, entity):
@@ -77,26 +220,31 @@ class Entity:
 
 
 class Sprite(Entity):
-    def __init__(self, pos, img, colkey=BLACK):
+
+    __slots__ = ("img", "layer")
+
+    def __init__(self, pos, img):
         self.img = img
-        self.colkey = colkey
-        radius = (self.img.w + self.img.h) / 4
-        super().__init__(pos, radius=radius)
+        super().__init__(pos, radius=img.radius)
 
     def draw(self):
-        pos = self.pos - v2(self.img.w / 2, self.img.h / 2)  # pos = center of image
-        pos += Entity.offset
-        px.blt(*pos, *self.img, colkey=self.colkey)
+        # pos = center of image
+        img = self.img
+        pos = self.pos
+        px.blt(pos.x - img.hw, pos.y - img.hh, *img.args)
 
 
 class ASprite(Sprite):
-    def __init__(self, pos, frames, freq, colkey=BLACK):
+
+    __slots__ = ("frames", "frame_count", "freq", "pt")
+
+    def __init__(self, pos, frames, freq):
         self.frames = frames
         self.frame_count = 0
         self.freq = freq
-        self.pt = time()
+        self.pt = now()
         self.img = frames[self.frame_count]
-        super().__init__(pos, self.img, colkey=colkey)
+        super().__init__(pos, self.img)
 
     def update(self, dt, t):
         if t - self.pt >= self.freq:
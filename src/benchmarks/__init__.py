@@ -0,0 +1 @@
+"""Benchmarks, run them from the src directory: python -m benchmarks.<name>"""
@@ -0,0 +1,110 @@
+"""Stress benchmark of the enemy / player bullet collision pass.
+
+Compares the brute force nested loops, the vectorized all pairs kernel,
+the SpatialHash broadphase with its vectorized narrow phase on the pairs
+sharing a cell, and the game choice between the two by count of pairs,
+on a crowded arena. Usage :
+python -m benchmarks.collisions [--bullets N]
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from constants import WIDTH, HEIGHT
+from vector import Vec2 as v2
+from base import Entity
+from collisions import SpatialHash, circles, hit_matrix, hit_pairs, pair_hits
+
+
+def make_entities(count, radius, top, bottom):
+    return [
+        Entity(v2(random.uniform(0, WIDTH), random.uniform(top, bottom)), radius)
+        for _ in range(count)
+    ]
+
+
+def brute_force(enemies, bullets, grids):
+    hits = 0
+    used = set()
+    for enemy in reversed(enemies):
+        for n in range(len(bullets) - 1, -1, -1):
+            if n not in used and enemy.collide_with(bullets[n]):
+                used.add(n)
+                hits += 1
+                break
+    return hits
+
+
+def spatial_hash(enemies, bullets, grids):
+    enemy_grid, bullet_grid = grids
+    centers, radii = circles(enemies)
+    bullet_centers, bullet_radii = circles(bullets)
+    enemy_grid.fill(centers, radii)
+    bullet_grid.fill(bullet_centers, bullet_radii)
+    i, j = enemy_grid.pairs(bullet_grid)
+    return count_hits(*pair_hits(centers, radii, bullet_centers, bullet_radii, i, j))
+
+
+def kernel(enemies, bullets, grids):
+    return count_hits(*np.nonzero(hit_matrix(*circles(enemies), *circles(bullets))))
+
+
+def game(enemies, bullets, grids):
+    # The kernel or the grid, by count of pairs
+    return count_hits(*hit_pairs(*circles(enemies), *circles(bullets), *grids))
+
+
+def count_hits(i, j):
+    # One bullet, one hit, newest enemy then newest bullet first
+    touching = {}
+    for e, b in zip(i.tolist(), j.tolist()):
+        touching.setdefault(e, []).append(b)
+    used = set()
+    for e in sorted(touching, reverse=True):
+        for b in reversed(touching[e]):
+            if b not in used:
+                used.add(b)
+                break
+    return len(used)
+
+
+def bench(func, enemies, bullets, frames):
+    grids = SpatialHash(), SpatialHash()
+    start = time.perf_counter()
+    for _ in range(frames):
+        hits = func(enemies, bullets, grids)
+    return (time.perf_counter() - start) / frames * 1000, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--enemies", type=int, default=40)
+    parser.add_argument(
+        "--bullets", type=int, nargs="+", default=[10, 50, 200, 500, 1000]
+    )
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    # Worst case : most of the pairs miss, enemies above, bullets below
+    enemies = make_entities(args.enemies, 6, 0, HEIGHT / 3)
+    print(f"{args.enemies} enemies")
+    print(
+        f"{'bullets':>8}{'brute ms':>10}{'hash ms':>9}{'kernel ms':>11}{'game ms':>9}"
+    )
+    for count in args.bullets:
+        bullets = make_entities(count, 4.25, HEIGHT / 4, HEIGHT)
+        brute, hits_brute = bench(brute_force, enemies, bullets, args.frames)
+        hashed, hits_hash = bench(spatial_hash, enemies, bullets, args.frames)
+        vector, hits_kernel = bench(kernel, enemies, bullets, args.frames)
+        chosen, hits_game = bench(game, enemies, bullets, args.frames)
+        assert hits_brute == hits_hash == hits_kernel == hits_game
+        print(f"{count:>8}{brute:>10.2f}{hashed:>9.2f}{vector:>11.2f}{chosen:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Memory of the live entities, at the peak of a combat scene.
+
+Runs a scene of benchmarks.scenarios headless, and at the frame with the
+most live enemies and bullets reports the bytes used by each entity: the
+object, its __dict__ if any, and the vectors it owns. Enemy bullets are
+rows of arrays, reported by row. Usage :
+python -m benchmarks.memory [scenario] [--frames N] [--output FILE] [--compare FILE]
+"""
+
+import argparse
+import json
+import sys
+from sys import getsizeof
+
+from vector import Vec2
+from base import Updatable
+from bullets import Bullet, EnBullet
+from enemies import Enemy
+from benchmarks.scenarios import SCENARIOS, setup, step
+
+
+def owned(obj):
+    # Attribute values of obj, from its slots and its __dict__
+    for cls in type(obj).__mro__:
+        for name in cls.__dict__.get("__slots__", ()):
+            if hasattr(obj, name):
+                yield getattr(obj, name)
+    yield from getattr(obj, "__dict__", {}).values()
+
+
+def entity_bytes(obj):
+    size = getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += getsizeof(obj.__dict__)
+    vectors = {id(value): value for value in owned(obj) if type(value) is Vec2}
+    return size + sum(getsizeof(vector) for vector in vectors.values())
+
+
+def live_entities():
+    return list(Enemy.enemies) + list(Bullet.bullets)
+
+
+def run(refill, frames, seed):
+    runner = setup(frames, seed)
+    peak = []
+    for frame in range(frames):
+        refill(runner, frame)
+        step(runner)
+        entities = live_entities()
+        if len(entities) > len(peak):
+            peak = entities
+            by_class = {}
+            for entity in entities:
+                sizes = by_class.setdefault(type(entity).__name__, [])
+                sizes.append(entity_bytes(entity))
+            peak_frame = frame
+            peak_bullets = len(EnBullet.field)
+
+    field = EnBullet.field
+    row = sum(getattr(field, name)[0].nbytes for name in ("pos", "vel", "col", "uid"))
+    total = sum(sum(sizes) for sizes in by_class.values())
+    return {
+        "frame": peak_frame,
+        "entities": len(peak),
+        "bytes_per_entity": round(total / max(len(peak), 1), 1),
+        "classes": {
+            name: {"count": len(sizes), "bytes": round(sum(sizes) / len(sizes), 1)}
+            for name, sizes in sorted(by_class.items())
+        },
+        "enemy_bullets": peak_bullets,
+        "bytes_per_enemy_bullet": row,
+        "updatables": len(Updatable.updatables),
+    }
+
+
+def compare(result, baseline):
+    print(f"{'class':<12}{'bytes':>16}", file=sys.stderr)
+    for name, entry in result["classes"].items():
+        if name in baseline["classes"]:
+            before = baseline["classes"][name]["bytes"]
+            print(
+                f"{name:<12}{before:>8.0f} -> {entry['bytes']:<5.0f}", file=sys.stderr
+            )
+    before, after = baseline["bytes_per_entity"], result["bytes_per_entity"]
+    print(f"{'all':<12}{before:>8.0f} -> {after:<5.0f}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenario", nargs="?", default="siders", choices=SCENARIOS)
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON report file, stdout if not given")
+    parser.add_argument("--compare", help="JSON report of a previous run")
+    args = parser.parse_args()
+
+    result = run(SCENARIOS[args.scenario], args.frames, args.seed)
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
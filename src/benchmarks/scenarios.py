@@ -0,0 +1,163 @@
+"""Worst case combat scenes, run headless for a fixed number of frames.
+
+Each scene is built from the game classes and kept crowded by a refill
+function called every frame. Reports fps, frame latency percentiles and
+peak object counts as JSON, a previous report can be given to compare
+runs on the same machine. Usage :
+python -m benchmarks.scenarios [--frames N] [--output FILE] [--compare FILE]
+"""
+
+import argparse
+import json
+import random
+import sys
+from time import perf_counter
+
+import numpy as np
+
+import backend as px
+from constants import WIDTH, HEIGHT, MID_W
+from vector import Vec2 as v2
+from base import Registry
+from enemies import Enemy, Sider, Pendulum, BigBoss
+from gfx import BigExplosion, ParticleBudget
+from gamestates import GameStateStart
+from utils import Scheduler
+from pool import Pool
+from headless import HeadlessRunner
+
+
+def siders(runner, frame):
+    # Spirals crossing each other
+    if frame % 20 == 0 and len(Enemy.enemies) < 8:
+        Sider(direc=1 if frame % 40 else -1)
+
+
+def bigboss(runner, frame):
+    # Phase 2 : rings of bullets and En2 children
+    if frame == 0:
+        boss = BigBoss(v2(MID_W, 40))
+        boss.target = runner.game.ship
+        for towergun in boss.towerguns:
+            towergun.remove()
+        boss.towerguns.clear()
+        boss.pos = v2(MID_W, 40)
+        boss.starting = False
+        boss.phase2 = True
+        boss.birth = boss.delay_shoot = boss.delay_enemy = runner.clock.t
+    for enemy in Enemy.enemies:
+        if isinstance(enemy, BigBoss):
+            enemy.life = 20  # Stay alive, with En2 children
+
+
+def pendulums(runner, frame):
+    # Three of them firing 16 bullets rings
+    if frame % 60 == 0:
+        count = sum(isinstance(enemy, Pendulum) for enemy in Enemy.enemies)
+        for n in range(count, 3):
+            Pendulum(v2(WIDTH * (n + 1) / 4, 10))
+
+
+def explosions(runner, frame):
+    # A chain of big explosions
+    if frame % 15 == 0:
+        BigExplosion(v2(random.uniform(0, WIDTH), random.uniform(0, HEIGHT)))
+
+
+SCENARIOS = {
+    "siders": siders,
+    "bigboss": bigboss,
+    "pendulums": pendulums,
+    "explosions": explosions,
+}
+
+
+def setup(frames, seed):
+    runner = HeadlessRunner(seed=seed)
+    game = runner.game
+    game.state = GameStateStart(game)
+    game.lives = frames  # No game over
+    runner.backend.pressed = {px.KEY_X}  # Always firing
+    return runner
+
+
+def step(runner):
+    # As Game.step, without the army
+    state = runner.game.state
+    runner.clock.advance()
+    t = runner.clock.t
+    Scheduler.run(t)
+    state.update_entities(runner.clock.step, t)
+    state.handle_collisions()
+    Registry.flush_all()
+    Pool.recycle_all()
+    state.draw()
+
+
+def run(refill, frames, seed):
+    runner = setup(frames, seed)
+    game = runner.game
+
+    latencies = np.zeros(frames)
+    peaks = {}
+    start = perf_counter()
+    for frame in range(frames):
+        frame_start = perf_counter()
+        refill(runner, frame)
+        step(runner)
+        latencies[frame] = perf_counter() - frame_start
+        for name, count in game.counts().items():
+            peaks[name] = max(peaks.get(name, 0), count)
+    elapsed = perf_counter() - start
+
+    p50, p90, p99 = np.percentile(latencies * 1000, (50, 90, 99))
+    return {
+        "frames": frames,
+        "fps": round(frames / elapsed, 1),
+        "p50_ms": round(p50, 3),
+        "p90_ms": round(p90, 3),
+        "p99_ms": round(p99, 3),
+        "max_ms": round(latencies.max() * 1000, 3),
+        "peaks": peaks,
+        "pools": Pool.stats(),
+        "particle_budget": dict(ParticleBudget.stats),
+    }
+
+
+def compare(report, baseline):
+    print(f"{'scenario':<12}{'fps':>16}{'p99 ms':>18}", file=sys.stderr)
+    for name, result in report.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]
+        fps = f"{before['fps']:.0f} -> {result['fps']:.0f}"
+        p99 = f"{before['p99_ms']:.2f} -> {result['p99_ms']:.2f}"
+        ratio = result["fps"] / before["fps"]
+        print(f"{name:<12}{fps:>16}{p99:>18}  x{ratio:.2f}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS))
+    parser.add_argument("--frames", type=int, default=1800)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON report file, stdout if not given")
+    parser.add_argument("--compare", help="JSON report of a previous run")
+    args = parser.parse_args()
+
+    report = {
+        name: run(SCENARIOS[name], args.frames, args.seed) for name in args.scenarios
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Per operation timings of Vector against Vec2.
+
+Usage : python -m benchmarks.vector_ops [--number N]
+"""
+
+import argparse
+import timeit
+
+from vector import Vector, Vec2
+
+# name -> statement, run with `v` as the vector class
+OPERATIONS = (
+    ("create", "v(1.0, 2.0)"),
+    ("add", "a + b"),
+    ("sub", "a - b"),
+    ("scale", "a * 0.5"),
+    ("pos += vel * dt", "q = p; q += b * 0.016"),
+    ("normalize * n", "a.normalize() * 45"),
+    ("normalize_scale", "a.normalize_scale(45)"),
+    ("dist_sq", "a.dist_sq(b)"),
+    ("rotate", "a.rotate(22.5)"),
+    ("unpack *pos", "f(*a)"),
+    ("draw offset", "a - v(4.5, 4.0) + b"),
+)
+
+
+def setup_for(cls):
+    def f(x, y):
+        pass
+
+    return {"v": cls, "a": cls(3.0, 4.0), "b": cls(1.0, 2.0), "p": cls(0, 0), "f": f}
+
+
+def run(stmt, cls, number):
+    env = setup_for(cls)
+    if cls is Vector:
+        # Emulate the old semantics: no normalize_scale / dist_sq on Vector
+        stmt = stmt.replace("a.normalize_scale(45)", "a.normalize() * 45")
+        stmt = stmt.replace("a.dist_sq(b)", "(b - a) * (b - a)")
+    best = min(timeit.repeat(stmt, globals=env, number=number, repeat=5))
+    return best / number * 1e9  # ns per operation
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200_000)
+    args = parser.parse_args()
+
+    print(f"{'operation':<18}{'Vector ns':>11}{'Vec2 ns':>10}{'speedup':>9}")
+    for name, stmt in OPERATIONS:
+        old = run(stmt, Vector, args.number)
+        new = run(stmt, Vec2, args.number)
+        print(f"{name:<18}{old:>11.1f}{new:>10.1f}{old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
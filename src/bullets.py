@@ -1,70 +1,228 @@
-from constants import WIDTH, HEIGHT
-from vector import Vector as v2
-from base import Image, Sprite, Updatable, Drawable, Layer
+import heapq
 
+import numpy as np
+import backend as px
 
-class Bullet(Sprite, Updatable, Drawable):
+from constants import WIDTH, HEIGHT, POOL_SIZES
+from vector import Vec2 as v2
+from atlas import FRAMES
+from base import Sprite, Updatable, Drawable, Layer, Registry
+from collisions import circles, hit_matrix
+from pool import Pool, Pooled
+from utils import Scheduler
+
+MARGIN = 5  # Enemy bullets live until this far out of the screen
+
+
+class Bullet(Pooled, Sprite, Updatable, Drawable):
     # From the player's ship...
-    bullets = []
+    bullets = Registry()
+    pool = Pool(POOL_SIZES["Bullet"])
+    image = FRAMES["bullet"]
+    __slots__ = ("speed", "vel", "timer")
 
     @classmethod
     def clear_all(cls):
         for bullet in cls.bullets:
+            bullet.timer.cancel()
             bullet.stop_draw()
             bullet.stop_update()
+            bullet.release()
         cls.bullets.clear()
 
     def __init__(self, pos):
-        super().__init__(pos, Image(10, 0, 9, 8))
+        super().__init__(pos, self.image)
         self.speed = -120
         self.vel = v2(0, self.speed)
         self.start_update()
         self.set_draw_layer(Layer.fore)
-        self.bullets.append(self)
+        self.bullets.add(self)
+        # Straight up at constant speed: it leaves the screen at a known time
+        exit_time = (self.pos.y + self.img.h) / -self.speed
+        self.timer = Scheduler.schedule(self.remove, delay=max(exit_time, 0))
 
     def update(self, dt, t):
         self.pos += self.vel * dt
-        if self.pos[1] <= -self.img.h:
-            self.remove()
 
     def remove(self):
+        self.timer.cancel()
         self.stop_draw()
         self.stop_update()
         self.bullets.remove(self)
+        self.release()
 
 
-class EnBullet(Sprite, Updatable, Drawable):
-    # From ennemies ...
-    bullets = []
+class EnBulletField(Updatable, Drawable):
+    """All the enemy bullets, stored as a structure of arrays.
 
-    @classmethod
-    def clear_all(cls):
-        for bullet in cls.bullets:
-            bullet.stop_draw()
-            bullet.stop_update()
-        cls.bullets.clear()
+    Positions, velocities and colors live in contiguous numpy arrays, so
+    moving every bullet is a single vectorized step per frame.
+    Bullets are kept in creation order, the newest being the last one.
 
-    def __init__(self, pos, vel, col=0):  # col : 0 = red, 1 = blue, 2 = green
-        super().__init__(pos, Image(96, 6 * col, 5, 5))
-        self.vel = vel
+    They move in straight lines: the time each one leaves the screen is
+    known at its creation, and waits in a heap with the bullet uid. A frame
+    only culls the bullets due, found by uid in the ordered uid array.
+    """
+
+    img = FRAMES["en_bullet"]
+    radius = img.radius
+
+    def __init__(self, capacity=256):
+        self.pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.col = np.zeros(capacity, dtype=np.int8)
+        self.uid = np.zeros(capacity, dtype=np.int64)  # Increasing with the rows
+        self.count = 0
+        self.next_uid = 0
+        self.time = 0.0  # Of the field, advanced by its updates
+        self.expiries = []  # Heap of (exit time, uid)
+        self.active = False
+
+    def __len__(self):
+        return self.count
+
+    def grow(self):
+        capacity = len(self.pos) * 2
+        for name in ("pos", "vel", "col", "uid"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[: self.count] = old[: self.count]
+            setattr(self, name, new)
+
+    def add(self, pos, vel, col=0):
+        if self.count == len(self.pos):
+            self.grow()
+        i = self.count
+        self.pos[i] = pos.x, pos.y
+        self.vel[i] = vel.x, vel.y
+        self.col[i] = col
+        self.count += 1
+        self.plan_exits(i, i + 1)
+        if not self.active:
+            self.activate()
+
+    def add_many(self, pos, vels, col=0):
+        """Bullets from pos, one by row of the velocities vels (n, 2)"""
+        n = len(vels)
+        while self.count + n > len(self.pos):
+            self.grow()
+        i, j = self.count, self.count + n
+        self.pos[i:j] = pos.x, pos.y
+        self.vel[i:j] = vels
+        self.col[i:j] = col
+        self.count = j
+        self.plan_exits(i, j)
+        if not self.active:
+            self.activate()
+
+    def plan_exits(self, i, j):
+        # Give the rows i to j their uids, and push their exit times
+        uids = range(self.next_uid, self.next_uid + j - i)
+        self.uid[i:j] = uids
+        self.next_uid += j - i
+        times = exit_times(self.pos[i:j], self.vel[i:j]) + self.time
+        for when, uid in zip(times.tolist(), uids):
+            if when != np.inf:
+                heapq.heappush(self.expiries, (when, uid))
+
+    def activate(self):
         self.start_update()
         self.set_draw_layer(Layer.fore)
-        self.bullets.append(self)
+        self.active = True
 
-    def out_of_bounds(self):
-        return (
-            self.pos[0] <= -5
-            or self.pos[0] >= WIDTH + 5
-            or self.pos[1] <= -5
-            or self.pos[1] >= HEIGHT + 5
-        )
+    def keep(self, mask):
+        """Keep only the bullets selected by mask, preserving their order"""
+        n = int(mask.sum())
+        self.pos[:n] = self.pos[: self.count][mask]
+        self.vel[:n] = self.vel[: self.count][mask]
+        self.col[:n] = self.col[: self.count][mask]
+        self.uid[:n] = self.uid[: self.count][mask]
+        self.count = n
 
-    def update(self, dt, t):
-        self.pos += self.vel * dt
-        if self.out_of_bounds():
-            self.remove()
+    def remove(self, index):
+        mask = np.ones(self.count, dtype=bool)
+        mask[index] = False
+        self.keep(mask)
 
-    def remove(self):
+    def clear(self):
+        self.count = 0
+        if self.active:
+            self.deactivate()
+
+    def deactivate(self):
+        self.expiries.clear()  # Only bullets already removed are left
         self.stop_draw()
         self.stop_update()
-        self.bullets.remove(self)
+        self.active = False
+
+    def collide_with(self, entity):
+        """Index of the newest bullet touching entity, -1 if none"""
+        n = self.count
+        if not n:
+            return -1
+        radii = np.full(n, self.radius)
+        hits = np.flatnonzero(hit_matrix(self.pos[:n], radii, *circles([entity])))
+        return hits[-1] if len(hits) else -1
+
+    def update(self, dt, t):
+        if not self.count:
+            self.deactivate()
+            return
+        n = self.count
+        self.pos[:n] += self.vel[:n] * dt
+        self.time += dt
+        expiries = self.expiries
+        if expiries and expiries[0][0] <= self.time:
+            self.retire()
+
+    def retire(self):
+        # Remove the bullets out of the screen, skipping the ones already
+        # removed by a hit
+        expiries = self.expiries
+        uids = []
+        while expiries and expiries[0][0] <= self.time:
+            uids.append(heapq.heappop(expiries)[1])
+        n = self.count
+        rows = np.searchsorted(self.uid[:n], uids)
+        rows = rows[rows < n]
+        rows = rows[np.isin(self.uid[rows], uids)]
+        if len(rows):
+            mask = np.ones(n, dtype=bool)
+            mask[rows] = False
+            self.keep(mask)
+
+    def draw(self):
+        # pos = center of image
+        n = self.count
+        img = self.img
+        xs = (self.pos[:n, 0] - img.hw).tolist()
+        ys = (self.pos[:n, 1] - img.hh).tolist()
+        vs = (self.col[:n] * 6).tolist()
+        bank, u, w, h, colkey = img.bank, img.u, img.w, img.h, img.colkey
+        for x, y, v in zip(xs, ys, vs):
+            px.blt(x, y, bank, u, v, w, h, colkey)
+
+
+def exit_times(pos, vel):
+    """Time before each bullet (rows of pos, vel) leaves the screen, 0 if
+    already out, inf if it never does
+    """
+    low = np.array([-MARGIN, -MARGIN])
+    high = np.array([WIDTH + MARGIN, HEIGHT + MARGIN])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        times = (np.where(vel > 0, high, low) - pos) / vel
+    times[vel == 0] = np.inf
+    inside = ((pos > low) & (pos < high)).all(axis=1)
+    return np.where(inside, times.min(axis=1), 0.0)
+
+
+class EnBullet:
+    # From ennemies ... Bullets are not objects, they are rows of the field
+    field = EnBulletField()
+
+    @classmethod
+    def clear_all(cls):
+        cls.field.clear()
+
+    def __init__(self, pos, vel, col=0):  # col : 0 = red, 1 = blue, 2 = green
+        self.field.add(pos, vel, col)
@@ -0,0 +1,43 @@
+from constants import FPS, MAX_STEPS
+
+
+class Clock:
+    """Simulation clock, advancing by fixed steps.
+
+    The real elapsed time given to tick() is accumulated and turned into
+    whole steps, the game is updated once per step: a run does not depend
+    on the frame rate and can be stepped faster than real time. A hitch is
+    clamped to MAX_STEPS steps, the game slows down instead of jumping.
+    """
+
+    def __init__(self, step=1 / FPS, max_steps=MAX_STEPS):
+        self.step = step
+        self.max_steps = max_steps
+        self.frame = 0
+        self.t = 0.0
+        self.accumulator = 0.0
+
+    def tick(self, elapsed):
+        """Add real elapsed seconds, return the number of steps to run"""
+        self.accumulator += min(elapsed, self.max_steps * self.step)
+        steps = int(self.accumulator / self.step)
+        self.accumulator -= steps * self.step
+        return steps
+
+    def advance(self):
+        # From the frame count, no drift summing floats
+        self.frame += 1
+        self.t = self.frame * self.step
+
+
+current = Clock()
+
+
+def use(clock):
+    """Make clock the time source of the game"""
+    global current
+    current = clock
+
+
+def now():
+    return current.t
@@ -0,0 +1,104 @@
+import math
+
+import numpy as np
+
+from constants import WIDTH, HEIGHT
+
+# Below this count of pairs, testing them all is cheaper than the grid
+GRID_MIN_PAIRS = 8000
+
+
+class SpatialHash:
+    """Uniform grid over the arena, used as collision broadphase.
+
+    Circles are registered by index in every cell overlapped by their
+    bounding box, as sorted arrays of (cell, index): filling the grid and
+    pairing two grids are a few vectorized steps, whatever the count.
+    Positions outside of the arena are clamped to the border cells, so off
+    screen entities still meet each other there. The grid is meant to be
+    filled again every frame.
+    """
+
+    def __init__(self, cell_size=16, width=WIDTH, height=HEIGHT):
+        self.cell_size = cell_size
+        self.cols = math.ceil(width / cell_size)
+        self.rows = math.ceil(height / cell_size)
+        self.size = 0  # Count of circles
+        self.cells = np.zeros(0, dtype=np.intp)  # Sorted
+        self.items = np.zeros(0, dtype=np.intp)  # Circle of each cell entry
+
+    def fill(self, centers, radii):
+        """Register the circles (n, 2), (n,) by index, replacing the old ones"""
+        self.size = n = len(radii)
+        last = np.array([self.cols - 1, self.rows - 1])
+        reach = radii[:, np.newaxis]
+        low = np.clip((centers - reach) // self.cell_size, 0, last).astype(np.intp)
+        high = np.clip((centers + reach) // self.cell_size, 0, last).astype(np.intp)
+        span = high - low + 1
+        count = span[:, 0] * span[:, 1]  # Cells by circle
+        items = np.repeat(np.arange(n), count)
+        k = spread(count)  # Rank of the cell in the box of its circle
+        width = span[items, 0]
+        x = low[items, 0] + k % width
+        y = low[items, 1] + k // width
+        cells = y * self.cols + x
+        order = np.argsort(cells, kind="stable")
+        self.cells = cells[order]
+        self.items = items[order]
+
+    def pairs(self, other):
+        """Index arrays (i, j) of the circles of self and other sharing at
+        least one cell, each pair once, sorted by i then j
+        """
+        first = np.searchsorted(other.cells, self.cells, "left")
+        count = np.searchsorted(other.cells, self.cells, "right") - first
+        i = np.repeat(self.items, count)
+        j = other.items[np.repeat(first, count) + spread(count)]
+        keys = np.unique(i * other.size + j)
+        return keys // other.size, keys % other.size
+
+
+def spread(count):
+    # 0 .. count[k] - 1 for each k, concatenated
+    total = int(count.sum())
+    return np.arange(total) - np.repeat(np.cumsum(count) - count, count)
+
+
+def circles(entities, radius="radius"):
+    """Centers and radii arrays of entities, radius is the attribute to use"""
+    n = len(entities)
+    centers = np.array([(e.pos.x, e.pos.y) for e in entities], dtype=float)
+    radii = np.fromiter((getattr(e, radius) for e in entities), float, n)
+    return centers.reshape(n, 2), radii
+
+
+def hit_matrix(centers_a, radii_a, centers_b, radii_b):
+    """Boolean matrix, [i, j] is True when circle a[i] touches circle b[j].
+
+    All the pairs are tested at once with a broadcasted squared distance.
+    """
+    dist = centers_a[:, np.newaxis, :] - centers_b[np.newaxis, :, :]
+    dist_square = np.einsum("ijk,ijk->ij", dist, dist)
+    reach = radii_a[:, np.newaxis] + radii_b[np.newaxis, :]
+    return dist_square <= reach * reach
+
+
+def hit_pairs(centers_a, radii_a, centers_b, radii_b, grid_a, grid_b):
+    """Index arrays (i, j) of the touching circles a[i], b[j], sorted by i
+    then j. Small sets test all the pairs, larger ones only the pairs
+    sharing a cell of the grids, which are filled here.
+    """
+    if len(radii_a) * len(radii_b) < GRID_MIN_PAIRS:
+        return np.nonzero(hit_matrix(centers_a, radii_a, centers_b, radii_b))
+    grid_a.fill(centers_a, radii_a)
+    grid_b.fill(centers_b, radii_b)
+    i, j = grid_a.pairs(grid_b)
+    return pair_hits(centers_a, radii_a, centers_b, radii_b, i, j)
+
+
+def pair_hits(centers_a, radii_a, centers_b, radii_b, i, j):
+    """The pairs (i, j) of circles a[i], b[j] that touch, in the same order"""
+    dist = centers_a[i] - centers_b[j]
+    reach = radii_a[i] + radii_b[j]
+    hit = np.einsum("ij,ij->i", dist, dist) <= reach * reach
+    return i[hit], j[hit]
@@ -1,11 +1,25 @@
 # Pyxel config
 FPS = 60
+MAX_STEPS = 4  # Simulation steps caught up in a frame at most
+PROFILE_FRAMES = 300  # Frames kept by the profiler
+# Live particles of all the systems, bursts are degraded beyond
+PARTICLE_BUDGET = 600
+# Quality governor : frames averaged, work time thresholds in ms
+QUALITY_WINDOW = 60
+QUALITY_DOWN_MS = 14
+QUALITY_UP_MS = 8
+# Free instances kept by the object pools
+POOL_SIZES = {"Bullet": 32, "En1": 16, "En2": 16, "En3": 16}
 SHOW_CURSOR = False
 WIDTH = 160
 HEIGHT = 120
 MID_W = WIDTH / 2
 MID_H = HEIGHT / 2
 SCORE_FILE = "lastspacefighter_scores.dat"
+BACKDROP_BANK = 1  # Image bank free for the ending backdrop
+STARS_BANK = 2  # Image bank of the star strips
+STAR_FIELD = "tiles"  # Or "particles", one by star
+LEVEL_PACK = "default"  # File of the levels directory, without .json
 
 
 # colors
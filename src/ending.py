@@ -1,14 +1,17 @@
-from time import time
+from clock import now
 import random
 import math
 
-import pyxel as px
+import numpy as np
+import backend as px
 
-from vector import Vector as v2
+from vector import Vec2 as v2
 from utils import center_txt
 
-from gfx import Particle
-from base import Image, Sprite, ASprite, Entity
+from gfx import ParticleSystem
+from quality import Quality
+from base import Sprite, ASprite
+from atlas import FRAMES
 from constants import (
     WIDTH,
     HEIGHT,
@@ -22,6 +25,7 @@ from constants import (
     RED,
     GREEN,
     CYAN,
+    BACKDROP_BANK,
 )
 from scores import ScoresHandler
 
@@ -33,7 +37,7 @@ GRAD3 = HEIGHT - 4  # BROWN
 
 class BigStar(ASprite):
     def __init__(self, pos, freq=0.5):
-        super().__init__(pos, [Image(44, 16, 11, 11), Image(56, 16, 7, 11)], freq)
+        super().__init__(pos, FRAMES["big_star"], freq)
 
 
 class Star:
@@ -52,21 +56,20 @@ class Star:
             self.color = LIGHT_GREY
 
     def draw(self):
-        pos = self.pos + Entity.offset
-        # px.pix(*pos, self.color)
-        px.pset(*pos, self.color)
+        # px.pix(*self.pos, self.color)
+        px.pset(*self.pos, self.color)
 
 
 class PulseStar(ASprite):
     def __init__(self, pos, freq=0.5):
-        super().__init__(pos, [Image(64, 16, 3, 3), Image(68, 16, 3, 3)], freq)
+        super().__init__(pos, FRAMES["pulse_star_high"], freq)
         self.set_frames()
 
     def set_frames(self):
         if self.pos.y < GRAD2:
-            self.frames = [Image(64, 16, 3, 3), Image(68, 16, 3, 3)]
+            self.frames = FRAMES["pulse_star_high"]
         else:
-            self.frames = [Image(64, 20, 3, 3), Image(68, 20, 3, 3)]
+            self.frames = FRAMES["pulse_star_low"]
 
 
 class ShootingStar:
@@ -77,14 +80,13 @@ class ShootingStar:
         self.duration = 0.8
         self.speed = 90
         self.vel = self.dir * self.speed
-        self.particles = []
+        self.particles = ParticleSystem(capacity=160)
 
-    def add_particle(self, pos):
-        pos = pos
-        vel = v2(random.uniform(-1, 1), random.uniform(-1, 1)).normalize() * 3
-        acc = v2()
-
-        self.particles.append(Particle(pos, 1, vel, acc, self.duration, WHITE))
+    def add_particles(self, n):
+        # Trail particles drifting at 3 pixels per second
+        angle = ParticleSystem.rng.uniform(0, 2 * math.pi, n)
+        vel = np.column_stack((np.cos(angle), np.sin(angle))) * 3
+        self.particles.emit((self.pos.x, self.pos.y), vel, 0, self.duration, 1, WHITE)
 
     def is_out(self):
         margin = WIDTH
@@ -94,42 +96,31 @@ class ShootingStar:
 
     def update(self, dt, t):
         self.pos += self.vel * dt
-        if len(self.particles) < 150:
-            for _ in range(3):
-                self.add_particle(self.pos)
-
-        for p in self.particles:
-            p.update(dt)
-            if p.pos.y < GRAD1:
-                p.color = BLUE
-            elif p.pos.y < GRAD2:
-                p.color = PURPLE
-            elif p.pos.y < GRAD3:
-                p.color = BROWN
-            else:
-                p.color = LIGHT_GREY
-
-            if p.is_dead:
-                self.particles.remove(p)
-                del p
+        particles = self.particles
+        if len(particles) < Quality.settings["trail"]:
+            self.add_particles(3)
+
+        particles.integrate(dt)
+        n = len(particles)
+        y = particles.pos[:n, 1]
+        particles.col[:n] = np.select(
+            (y < GRAD1, y < GRAD2, y < GRAD3), (BLUE, PURPLE, BROWN), LIGHT_GREY
+        )
+        particles.keep(particles.life[:n] > 0)
 
     def draw(self):
-        for p in self.particles:
-            p.draw()
-        pos = self.pos + Entity.offset
-        # px.pix(*pos, WHITE)
-        px.pset(*pos, WHITE)
+        self.particles.draw()
+        # px.pix(*self.pos, WHITE)
+        px.pset(*self.pos, WHITE)
 
 
 class RewardAnim:
     def __init__(self):
-        self.planet = Sprite(v2(WIDTH * 3 / 10, HEIGHT - 47), Image(195, 39, 61, 61))
-        mfw = 37  # moon front width
-        self.moon_front = Sprite(v2(-mfw / 2, HEIGHT - 40), Image(218, 0, mfw, mfw))
-        mbw = 16  # moon back width
-        self.moon_back = Sprite(
-            v2(WIDTH + mbw / 2, HEIGHT - 45), Image(200, 0, mbw, mbw)
-        )
+        self.planet = Sprite(v2(WIDTH * 3 / 10, HEIGHT - 47), FRAMES["planet"])
+        mfw = FRAMES["moon_front"].w  # moon front width
+        self.moon_front = Sprite(v2(-mfw / 2, HEIGHT - 40), FRAMES["moon_front"])
+        mbw = FRAMES["moon_back"].w  # moon back width
+        self.moon_back = Sprite(v2(WIDTH + mbw / 2, HEIGHT - 45), FRAMES["moon_back"])
         self.big_stars = [
             BigStar(v2(WIDTH * 7 / 80, HEIGHT * 1 / 2), freq=0.05),
             BigStar(v2(WIDTH * 19 / 20, HEIGHT * 3 / 20), freq=0.075),
@@ -194,9 +185,10 @@ class RewardAnim:
         self.last_shooting = 0
         self.birth = 0
         self.t = 0.5
+        self.backdrop_version = None  # Scores version of the cached backdrop
 
     def start(self):
-        self.birth = time()
+        self.birth = now()
 
     def destroy(self):
         del self
@@ -237,26 +229,55 @@ class RewardAnim:
         self.moon_back.pos += vel_mb * dt
         self.moon_front.pos += vel_mf * dt
 
+    def render_backdrop(self):
+        """Draw the static parts of the scene once, in the backdrop bank.
+        Back : gradient. Front, over the moon back : planet,
+        texts and scores, black being transparent.
+        """
+        image = px.image(BACKDROP_BANK)
+        image.rect(0, 0, WIDTH, HEIGHT * 2, BLACK)
+
+        # Back : gradient, clipped to its region
+        image.rect(0, GRAD1, WIDTH, GRAD2 - GRAD1, BLUE)
+        image.rect(0, GRAD2, WIDTH, GRAD3 - GRAD2, PURPLE)
+        image.rect(0, GRAD3, WIDTH, HEIGHT - GRAD3, BROWN)
+
+        # Front, below the back
+        y = HEIGHT
+        img = self.planet.img
+        x = self.planet.pos.x - img.hw
+        image.blt(x, y + self.planet.pos.y - img.hh, *img.args)
+
+        lines = [
+            f"You defeated",
+            f"the ennemies",
+            f"     ...    ",
+            f"All humanity",
+            f"will remember",
+            f"you as one of",
+            f"the bravest.",
+        ]
+        posx = WIDTH * 3 / 5
+        for n, l in enumerate(lines):
+            image.text(posx, y + HEIGHT * 1 / 20 + n * 6, l, LIGHT_GREY)
+        p = v2(posx, y + HEIGHT * 29 / 60)
+        ScoresHandler.draw(p, for_end=True, screen=image)
+
+        self.backdrop_version = ScoresHandler.version
+
     def draw(self):
+        if self.backdrop_version != ScoresHandler.version:
+            self.render_backdrop()
 
         # Background gradient
-        p1 = v2(0, GRAD1) + Entity.offset
-        p2 = v2(WIDTH, GRAD2) + Entity.offset
-        px.rect(*p1, *p2, BLUE)
-        p1 = v2(0, GRAD2) + Entity.offset
-        p2 = v2(WIDTH, GRAD3) + Entity.offset
-        px.rect(*p1, *p2, PURPLE)
-        p1 = v2(0, GRAD3) + Entity.offset
-        p2 = v2(WIDTH, HEIGHT) + Entity.offset
-        px.rect(*p1, *p2, BROWN)
+        px.blt(0, 0, BACKDROP_BANK, 0, 0, WIDTH, HEIGHT)
 
         # Shooting stars
         for star in self.shooting_stars:
             star.draw()
 
         # Title
-        p = v2(WIDTH * 3 / 80, HEIGHT * 1 / 20) + Entity.offset
-        px.blt(*p, 0, 0, 32, 84, 40, colkey=BLACK)
+        px.blt(WIDTH * 3 / 80, HEIGHT * 1 / 20, *FRAMES["title"].args)
 
         # stars
         for star in self.big_stars:
@@ -264,39 +285,18 @@ class RewardAnim:
         for star in self.stars:
             star.draw()
 
-        # Planet
+        # Planet, texts and scores
         self.moon_back.draw()
-        self.planet.draw()
+        px.blt(0, 0, BACKDROP_BANK, 0, HEIGHT, WIDTH, HEIGHT, colkey=BLACK)
 
         # Congratulations
         for n, c in enumerate("CONGRATULATIONS"):
             px.text(
                 18 + n * 4,
-                88 + math.sin(time() * 4 + n * self.t) * 3 + Entity.offset.y,
+                88 + math.sin(now() * 4 + n * self.t) * 3,
                 c,
                 CYAN,
             )
 
-        # Texts
-        lines = [
-            f"You defeated",
-            f"the ennemies",
-            f"     ...    ",
-            f"All humanity",
-            f"will remember",
-            f"you as one of",
-            f"the bravest.",
-        ]
-        posx = WIDTH * 3 / 5
-
-        y = HEIGHT * 1 / 20
-        for n, l in enumerate(lines):
-            posy = y + n * 6
-            p = v2(posx, posy) + Entity.offset
-            px.text(*p, l, LIGHT_GREY)
-
-        p = v2(posx, HEIGHT * 29 / 60) + Entity.offset
-        ScoresHandler.draw(p, for_end=True)
-
         # Planet front
         self.moon_front.draw()
@@ -1,11 +1,14 @@
+import inspect
 import math
 import random
-from time import time
+from functools import partial
+from clock import now
 
-import pyxel as px
+import backend as px
 
-from utils import Delay, map_range
-from base import ASprite, Entity, Image, Updatable, Drawable, Layer
+from utils import Scheduler, map_range
+from base import ASprite, Entity, Updatable, Drawable, Layer, Registry
+from atlas import FRAMES
 from constants import *
 from gfx import (
     Background,
@@ -13,31 +16,105 @@ from gfx import (
     HitFlash,
     ParticlesExplosion,
     BigExplosion,
-    ParticleStarField,
+    StarField,
 )
 from bullets import EnBullet
+from pool import Pool, Pooled
 from ship import Ship
-from vector import Vector as v2
-
-
-class Enemy(ASprite, Updatable, Drawable):
-
-    enemies = []
+from patterns import AimedFan, Cross, Ring, Spiral
+from trajectories import Trajectory, Sway, Loops, Swing, Orbit, PingPong, Legs
+from vector import Vec2 as v2
+
+
+class Enemy(Pooled, ASprite, Updatable, Drawable):
+
+    enemies = Registry()
+    types = {}  # Enemy classes by name, for the level packs
+    aims = False  # Shoots at a target, given at spawn
+    trajectory = None  # Moves the enemies that have one
+    # Level pack fields -> constructor arguments, None if not spawned by the
+    # army. The fields of the arguments without default are required.
+    spawn_params = {"pos": "pos"}
+    # The bosses are alone, they keep a __dict__
+    __slots__ = (
+        "life",
+        "birth",
+        "points",
+        "target",
+        "color",
+        "color_back",
+        "destroy_sound",
+        "hit_sound",
+        "previous_shoot",
+    )
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        Enemy.types[cls.__name__] = cls
 
     @classmethod
     def clear_all(cls):
         for enemy in cls.enemies:
             enemy.stop_update()
             enemy.stop_draw()
+            enemy.release()
         cls.enemies.clear()
+        Trajectory.clear_all()
+
+    @classmethod
+    def spawn_fields(cls):
+        """Required and optional fields of the level packs"""
+        params = inspect.signature(cls.__init__).parameters
+        required = [
+            field
+            for field, arg in cls.spawn_params.items()
+            if params[arg].default is inspect.Parameter.empty
+        ]
+        optional = [field for field in cls.spawn_params if field not in required]
+        return required, optional
+
+    @classmethod
+    def factory(cls, fields):
+        """Constructor bound to the fields of a level pack soldier"""
+        args = {cls.spawn_params[field]: value for field, value in fields.items()}
+        return partial(cls, **args)
 
-    def __init__(self, pos, frame, freq, colkey=BLACK):
-        super().__init__(pos, frame, freq, colkey=colkey)
+    @classmethod
+    def prewarm(cls):
+        # Before a wave with enemies of the class. Only the pools need it:
+        # the sprites are the atlas frames, built at import over the image
+        # banks loaded at start, and the sounds come with the resources file.
+        # The one sound set at spawn, En2's, plays a random note each time.
+        pool = cls.__dict__.get("pool")
+        if pool is not None:
+            pool.prewarm()
+
+    # Collision masks : radius and enable flag, against bullets and the ship.
+    # Enemies with a custom collider override them instead of collide_with
+    # so the collision pass can be vectorized.
+    @property
+    def bullet_radius(self):
+        return self.radius
+
+    @property
+    def ship_radius(self):
+        return self.radius
+
+    @property
+    def bullet_collision(self):
+        return True
+
+    @property
+    def ship_collision(self):
+        return True
+
+    def __init__(self, pos, frame, freq):
+        super().__init__(pos, frame, freq)
         self.init_pos()
         self.life = 1
-        self.birth = time()
+        self.birth = now()
         self.destroy_sound = 1
-        self.enemies.append(self)
+        self.enemies.add(self)
         self.start_update()
         self.set_draw_layer(Layer.main)
 
@@ -52,16 +129,33 @@ class Enemy(ASprite, Updatable, Drawable):
         elif self.pos.x == WIDTH:
             self.pos.x += self.frames[0].w / 2 + 1
 
+    def collide_with(self, entity):
+        if isinstance(entity, Ship):
+            enabled, radius = self.ship_collision, self.ship_radius
+        else:
+            enabled, radius = self.bullet_collision, self.bullet_radius
+        if not enabled:
+            return False
+        reach = radius + entity.radius
+        return self.pos.dist_sq(entity.pos) <= reach * reach
+
     def set_target(self, target: Entity):
         # What do enemy have to shoot (-> the ship in our case)
         self.target = target
 
+    def position_at(self, t):
+        """Position at the time t, past or future, on its trajectory"""
+        return self.trajectory.position_at(self, t)
+
     def remove(self):
         # Remove enemy from the game
         if self in self.enemies:
+            if self.trajectory is not None:
+                self.trajectory.remove(self)
             self.enemies.remove(self)
             self.stop_update()
             self.stop_draw()
+            self.release()
 
     def destroy(self):
         px.play(CHAN_DESTROY, self.destroy_sound)
@@ -79,29 +173,31 @@ class Enemy(ASprite, Updatable, Drawable):
 
 
 class En1(Enemy):
+
+    pool = Pool(POOL_SIZES["En1"])
+    imgs = FRAMES["en1"]
+    aims = True
+    trajectory = Sway(speed=20, amplitude=10, freq=3)
+    pattern = AimedFan(1, speed=45)
+    __slots__ = ()
+
     def __init__(self, pos):
-        super().__init__(pos, [Image(19, 0, 11, 11), Image(32, 0, 11, 11)], 0.5)
+        super().__init__(pos, self.imgs, 0.5)
         self.points = 200
         self.target = None  # What do i have to shoot
         self.color_back = DARK_GREEN
         self.color = GREEN
         self.destroy_sound = 2
         self.previous_shoot = self.birth
+        self.trajectory.add(self, self.birth, x=self.pos.x, y=self.pos.y)
         px.play(CHAN_SPAWN, 8)
 
     def update(self, dt, t):
         super().update(dt, t)
 
-        vx = math.cos((t - self.birth) * 3) * 10
-        vy = 20
-        self.center += v2(0, vy) * dt
-        self.pos = self.center + v2(vx, 0)
-
         # Enemy shoot
         if t - self.previous_shoot >= 1 and self.target.alive:
-            vel = self.target.pos - self.pos
-            vel = vel.normalize() * 45
-            EnBullet(self.pos, vel)
+            self.pattern.fire(self.pos, self.target.pos)
             self.previous_shoot = t
 
         # Out of bounds
@@ -111,41 +207,38 @@ class En1(Enemy):
 
 class En2(Enemy):
 
+    pool = Pool(POOL_SIZES["En2"])
+    imgs = FRAMES["en2"]
+    spawn_params = {"pos": "pos", "dir": "direc"}
+    trajectory = Loops(drift=v2(8, 20), radius=16, freq=4)
+    __slots__ = ("dir",)
+
     # To track a common frame count
     prev_t = 0  #  previous time
-    frame_count = 0
+    common_frame = 0
 
     def __init__(self, pos, direc=1):
-        super().__init__(
-            pos, [Image(76, 0, 9, 9), Image(86, 0, 9, 9)], 0.5, colkey=GREEN
-        )
+        super().__init__(pos, self.imgs, 0.5)
         self.points = 100
         self.color = CYAN
         self.color_back = BLUE
         self.dir = direc
+        self.trajectory.add(self, self.birth, x=self.pos.x, y=self.pos.y, dir=direc)
         self.play_spawn_sound()
 
     def play_spawn_sound(self):
         note = "abcdefg"[random.randint(0, 6)] + "0"
-        px.sound(9).set(note, "S", "7", "F", 15)
+        px.set_sound(9, note, "S", "7", "F", 15)
         px.play(CHAN_SPAWN, 9)
 
     def update(self, dt, t):
 
         if t - En2.prev_t >= self.freq:
-            En2.frame_count += 1
+            En2.common_frame += 1
             En2.prev_t = t
-        if En2.frame_count >= 2:  # 2 -> len(self.frames) hardcoded
-            En2.frame_count = 0
-        self.img = self.frames[En2.frame_count]
-
-        vel = v2(8 * self.dir, 20)
-        self.center += vel * dt
-        mov = v2(
-            math.cos((t - self.birth) * 4) * 16 * self.dir,
-            math.sin((t - self.birth) * 4) * 16,
-        )
-        self.pos = self.center + mov
+        if En2.common_frame >= 2:  # 2 -> len(self.frames) hardcoded
+            En2.common_frame = 0
+        self.img = self.frames[En2.common_frame]
 
         # Out of bounds
         if self.pos[1] > HEIGHT + 64:
@@ -153,8 +246,19 @@ class En2(Enemy):
 
 
 class En3(Enemy):
+
+    pool = Pool(POOL_SIZES["En3"])
+    imgs = FRAMES["en3"]
+    aims = True
+    # Stairs: right, down, left, down
+    trajectory = Legs(
+        [(v2(1, 0), 40), (v2(0, 1), 40), (v2(-1, 0), 40), (v2(0, 1), 40)], speed=50
+    )
+    pattern = AimedFan(1, speed=45)
+    __slots__ = ("speed_shoot",)
+
     def __init__(self, pos):
-        super().__init__(pos, [Image(44, 0, 15, 15), Image(60, 0, 15, 15)], 0.5)
+        super().__init__(pos, self.imgs, 0.5)
         self.points = 500
         self.life = 3
         self.target = None
@@ -164,28 +268,15 @@ class En3(Enemy):
         self.hit_sound = 4
         self.speed_shoot = 1
         self.previous_shoot = self.birth
-        self.speed = 50
+        self.trajectory.add(self, self.birth, x=self.pos.x, y=self.pos.y, dir=1)
         px.play(CHAN_SPAWN, 10)
 
     def update(self, dt, t):
         super().update(dt, t)
 
-        change = int((t - self.birth) * 1.25) % 4
-        if change == 0:
-            di = v2(1, 0)
-        elif change == 2:
-            di = v2(-1, 0)
-        else:
-            di = v2(0, 1)
-
-        vel = di * self.speed
-        self.pos += vel * dt
-
         # Enemy shoot
         if t - self.previous_shoot >= self.speed_shoot and self.target.alive:
-            vel = self.target.pos - self.pos
-            vel = vel.normalize() * 45
-            EnBullet(self.pos, vel)
+            self.pattern.fire(self.pos, self.target.pos)
             self.previous_shoot = t
 
         # Out of bounds
@@ -194,10 +285,14 @@ class En3(Enemy):
 
 
 class Boss(Enemy):
+
+    imgs = FRAMES["boss"]
+    aims = True
+    pattern = Ring(16, speed=40, col=1)
+
     def __init__(self, pos):
-        super().__init__(pos, [Image(102, 0, 48, 44), Image(151, 0, 48, 44)], 0.5)
+        super().__init__(pos, self.imgs, 0.5)
         self.target = None
-        self.radius = 7
         self.life = self.max_life = 50
         self.points = self.max_life * 1000
         self.color = GREY
@@ -210,7 +305,7 @@ class Boss(Enemy):
         HitFlash.color_sky = PURPLE
         HitFlash.color_stars = FLESH
         Background.color = PURPLE
-        ParticleStarField.color = FLESH
+        StarField.color = FLESH
         # timing
         self.dying = False
         self.starting = True
@@ -220,26 +315,30 @@ class Boss(Enemy):
 
     def destroy(self):
         self.dying = True
-        self.death_time = time()
+        self.death_time = now()
 
     def _destroy(self):
         HitFlash.color_sky = BLACK
         Background.color = BLACK
         HitFlash.color_stars = BLUE
-        ParticleStarField.color = BLUE
+        StarField.color = BLUE
         super().remove()
         # music again after boss death
-        Delay(lambda: px.playm(3, loop=True), delay=5)
+        Scheduler.schedule(lambda: px.playm(3, loop=True), delay=5)
 
-    def collide_with(self, entity):
-        if not self.starting and not self.dying:
-            hit_ship = isinstance(entity, Ship)
-            self.radius = 22 if hit_ship else 7
-            result = super().collide_with(entity)
-            if result and not hit_ship:
-                self.pos += v2(0, -5)
-            return result
-        return False
+    bullet_radius = 7
+    ship_radius = 22
+
+    @property
+    def bullet_collision(self):
+        return not self.starting and not self.dying
+
+    ship_collision = bullet_collision
+
+    def hit_by(self, entity):
+        super().hit_by(entity)
+        if not isinstance(entity, Ship):
+            self.pos += v2(0, -5)  # Pushed back by bullets
 
     def update(self, dt, t):
         super().update(dt, t)
@@ -254,14 +353,14 @@ class Boss(Enemy):
             if since_birth <= 3:  # Waiting boss
                 if not int(round(since_birth % 0.3, 2) * 10):
                     Background.color = PURPLE
-                    ParticleStarField.color = FLESH
+                    StarField.color = FLESH
                 else:
                     Background.color = BLACK
-                    ParticleStarField.color = BLUE
+                    StarField.color = BLUE
             else:  # boss is here
                 px.play(CHAN_SPAWN, 11)  #  spawn sound
                 Background.color = PURPLE
-                ParticleStarField.color = FLESH
+                StarField.color = FLESH
                 self.starting = False
                 self.birth = t
                 self.previous_shoot = t
@@ -284,8 +383,8 @@ class Boss(Enemy):
             since_death = t - self.death_time
             if since_death >= 3.6:  #  final explosion
                 px.playm(0)
-                Delay(lambda: HitFlash(self.pos), delay=1.25)
-                Delay(lambda: BigExplosion(self.pos), delay=1.25)
+                Scheduler.schedule(lambda: HitFlash(self.pos), delay=1.25)
+                Scheduler.schedule(lambda: BigExplosion(self.pos), delay=1.25)
                 self._destroy()
             elif not int(round(since_death % 0.4, 2) * 10):  # boss is imploding
                 x = random.uniform(-20, 20)
@@ -307,11 +406,7 @@ class Boss(Enemy):
             and not self.dying
             and self.target.alive
         ):
-            for a in range(16):
-                vel_b = v2(0, 1)
-                vel_b = vel_b.rotate(a * 22.5)  # 22.5 = 360 / 16
-                vel_b *= 40
-                EnBullet(self.pos, vel_b, col=1)
+            self.pattern.fire(self.pos)
             self.previous_shoot = t
 
         if not self.target.alive:
@@ -321,7 +416,7 @@ class Boss(Enemy):
         super().draw()
         # Life bar
         if self.show_lifebar:
-            p1 = v2((WIDTH - 102) // 2, 3) + Entity.offset
+            p1 = v2((WIDTH - 102) // 2, 3)
             p2 = v2(101, 3)
             px.rect(*p1, *p2, BLUE)
             p3 = p1 + v2(1, 1)
@@ -333,8 +428,15 @@ class Boss(Enemy):
 
 
 class XRotator(Enemy):
+
+    imgs = FRAMES["xrotator"]
+    spawn_params = {"pos": "pos", "destination": "destination"}
+    trajectory = PingPong(speed=40)
+    pattern = Cross(speed=40)
+    __slots__ = ()
+
     def __init__(self, pos, destination):
-        super().__init__(pos, [Image(20, 12, 11, 11), Image(32, 12, 11, 11)], 0.5)
+        super().__init__(pos, self.imgs, 0.5)
         self.points = 500
         self.life = 3
         self.color_back = ORANGE
@@ -343,47 +445,52 @@ class XRotator(Enemy):
         self.hit_sound = 4
         self.previous_shoot = self.birth
 
-        self.start = self.pos = pos
-        self.destination = destination
-        self.speed = 40
+        self.trajectory.add(
+            self,
+            self.birth,
+            x=self.pos.x,
+            y=self.pos.y,
+            x1=destination.x,
+            y1=destination.y,
+        )
         px.play(CHAN_SPAWN, 8)  # spawn sound
 
     def update(self, dt, t):
         super().update(dt, t)
 
-        self.target = self.destination - self.pos
-        dist = self.target.norm()
-        if dist < 1:
-            self.vel = v2(0, 0)
-            self.destination, self.start = self.start, self.destination
-        else:
-            self.vel = self.target.normalize() * self.speed
-        self.pos += self.vel * dt
-
         # Fire
         if t - self.previous_shoot >= 1:  # and not game.end_game:
-            for a in range(4):
-                vel_b = v2(0, 1)
-                vel_b = vel_b.rotate(a * 90 + 45)  # 22.5 = 360 / 16
-                vel_b *= 40
-                EnBullet(self.pos, vel_b)
+            self.pattern.fire(self.pos)
             self.previous_shoot = t
 
 
 class Sider(Enemy):
 
+    imgs = FRAMES["sider"]
+    spawn_params = {"dir": "direc"}
+    gx = WIDTH / 16  # one unit of grid
+    # Down, to the side, down, back to the other side
+    trajectory = Legs(
+        [
+            (v2(0, 1), 2 * gx),
+            (v2(1, 0), 14 * gx),
+            (v2(0, 1), 2 * gx),
+            (v2(-1, 0), 14 * gx),
+        ],
+        speed=64,
+    )
+    pattern = Spiral(speed=45, rate=1)  # One turn a second
+    __slots__ = ("direc",)
+
     # To track a common frame count
     prev_t = 0  #  previous time
-    frame_count = 0
+    common_frame = 0
 
     def __init__(self, direc=1):
 
-        gx = WIDTH / 16  # one unit of grid
-        self.speed = 64
-        self.tc = self.speed / gx  # time to travel one unit of our grid
         self.direc = direc
-        self.pos = v2(MID_W + gx * 7 * -direc, -10)
-        super().__init__(self.pos, [Image(76, 10, 9, 9), Image(86, 10, 9, 9)], 0.5)
+        self.pos = v2(MID_W + self.gx * 7 * -direc, -10)
+        super().__init__(self.pos, self.imgs, 0.5)
 
         self.points = 800
         self.life = 4
@@ -392,39 +499,23 @@ class Sider(Enemy):
         self.destroy_sound = 2
         self.hit_sound = 4
         self.previous_shoot = self.birth
+        self.trajectory.add(self, self.birth, x=self.pos.x, y=self.pos.y, dir=direc)
 
         px.play(CHAN_SPAWN, 9)  # spawn sound
 
     def update(self, dt, t):
         # Synchronised frame accross all instances
         if t - Sider.prev_t >= self.freq:
-            Sider.frame_count += 1
+            Sider.common_frame += 1
             Sider.prev_t = t
-            if Sider.frame_count >= 2:  # 2 -> len(self.frames) hardcoded
-                Sider.frame_count = 0
-        self.img = self.frames[Sider.frame_count]
-
-        # move
-        c = (t - self.birth) * self.tc % 32
-        if c >= 0 and c < 2 or c >= 16 and c < 18:
-            di = v2(0, 1)
-        elif c >= 2 and c < 16:
-            di = v2(1 * self.direc, 0)
-        else:
-            di = v2(-1 * self.direc, 0)
-        vel = di * self.speed
-        self.pos += vel * dt
+            if Sider.common_frame >= 2:  # 2 -> len(self.frames) hardcoded
+                Sider.common_frame = 0
+        self.img = self.frames[Sider.common_frame]
 
         # shoot
         bls = 16  # Bullets per second
         if t - self.previous_shoot >= 1 / bls:  # and not game.end_game:
-            # 360° spiral
-            change = (t - self.birth) * bls % 16
-
-            vel_b = v2(0, 1)
-            vel_b = vel_b.rotate(22.5 * change)  # 22.5 = 360 / 16
-            vel_b *= 45
-            EnBullet(self.pos, vel_b)
+            self.pattern.fire(self.pos, t - self.birth)
             self.previous_shoot = t
 
         # Out of bounds
@@ -433,45 +524,39 @@ class Sider(Enemy):
 
 
 class Pendulum(Enemy):
+
+    imgs = FRAMES["pendulum"]
+    f = 1.25  # frequence of the move
+    # Half width, half height of the move in pixels, starting on top of it
+    trajectory = Swing(
+        speed=5, half_width=40, half_height=20, shrink=2, freq=f, phase=-math.pi / 2
+    )
+    pattern = Ring(16, speed=45)
+    __slots__ = ("count",)
+
     def __init__(self, pos):
-        super().__init__(
-            pos, [Image(0, 9, 9, 9), Image(10, 9, 9, 9)], 0.5, colkey=GREEN
-        )
+        super().__init__(pos, self.imgs, 0.5)
         self.points = 1000
         self.life = 10
         self.color_back = GREY
         self.color = LIGHT_GREY
         self.hit_sound = 7
         self.destroy_sound = 3
-        self.speed = 5
 
+        self.trajectory.add(self, self.birth, x=self.pos.x, y=self.pos.y)
         self.birth += math.pi / 2  # add time to start on top of pendulum move
         self.count = -1  #  count each half pi period used for shooting period
-        self.hwp = 40  # half width of pendulum move distance in pixels
-        self.hhp = 20  # half height of ...
-        self.f = 1.25  #  frequence of the move
 
         px.play(CHAN_SPAWN, 10)  # spawn sound
 
     def update(self, dt, t):
         super().update(dt, t)
 
-        # Move
         ti = t - self.birth
-        vx = math.sin(ti * self.f) * self.hwp
-        vy = math.cos(ti * (self.f * 2)) * self.hhp
-        self.center += v2(0, self.speed) * dt
-        self.hhp -= 2 * dt
-        self.pos = self.center + v2(vx, vy)
-
         c = ti // (1.5708 / self.f)  # 1.5708 -> pi / 2
         if c > self.count:  # and not game.end_game:
             if self.count % 2:
-                for a in range(16):
-                    vel_b = v2(0, 1)
-                    vel_b = vel_b.rotate(22.5 * a)  # 22.5 = 360 / 16
-                    vel_b *= 45
-                    EnBullet(self.pos, vel_b)
+                self.pattern.fire(self.pos)
             self.count += 1
 
         # Out of bounds
@@ -480,11 +565,20 @@ class Pendulum(Enemy):
 
 
 class TowerGun(Enemy):
+
+    imgs = En3.imgs
+    spawn_params = None  # Created by its BigBoss
+    trajectory = Orbit(radius=30, speed=-1)
+    __slots__ = ("id", "base", "speed_shoot", "speed", "pos_target")
+
     def __init__(self, n_id, base):
         self.id = n_id
         self.base = base  #  ref to core BigBoss
-        self.pos = self.get_pos(time())
-        super().__init__(self.pos, [Image(44, 0, 15, 15), Image(60, 0, 15, 15)], 0.5)
+        super().__init__(base.pos, self.imgs, 0.5)
+        # Quarter of the circle given by the id, turning with the time
+        angle = n_id * math.pi / 2 - self.birth
+        self.trajectory.add(self, self.birth, anchor=base, angle=angle)
+        self.pos = self.position_at(self.birth)
         self.life = 5
         self.points = self.life * 200
         self.color = RED
@@ -498,11 +592,12 @@ class TowerGun(Enemy):
 
         self.pos_target = None
 
-    def collide_with(self, entity):
-        # Test prevents being touch during the waiting boss phase
-        if self.base.starting:
-            return False
-        return super().collide_with(entity)
+    @property
+    def bullet_collision(self):
+        # Prevents being touch during the waiting boss phase
+        return not self.base.starting
+
+    ship_collision = bullet_collision
 
     def hit_by(self, entity):
         super().hit_by(entity)
@@ -512,20 +607,15 @@ class TowerGun(Enemy):
         self.base.towerguns.remove(self)
         super().destroy()
 
-    def get_pos(self, t):
-        p = v2(math.cos(-t), math.sin(-t)).normalize() * 30
-        return self.base.pos + p.rotate(90 * self.id)
-
     def update(self, dt, t):
         super().update(dt, t)
-        self.pos = self.get_pos(t)
         # shoot
         if (
             t - self.previous_shoot >= 0.5 and self.pos_target is not None
         ):  # and not game.end_game
             vel = self.pos_target - self.pos
             n = max(vel.norm(), 25)
-            vel = vel.normalize() * n
+            vel = vel.normalize_scale(n)
             EnBullet(self.pos, vel * 0.7, col=1)
             self.previous_shoot = t
 
@@ -537,12 +627,13 @@ class TowerGun(Enemy):
 
 class BigBoss(Enemy):
 
-    imgs_close = [Image(0, 73, 30, 30), Image(31, 73, 30, 30)]
-    imgs_open = [Image(0, 104, 30, 30), Image(31, 104, 30, 30)]
+    imgs_close = FRAMES["bigboss_close"]
+    imgs_open = FRAMES["bigboss_open"]
+    aims = True
+    pattern = Ring(16, speed=40, col=1)  # Of the phase 2
 
     def __init__(self, pos):
-        super().__init__(pos, BigBoss.imgs_close, 0.5, colkey=GREEN)
-        self.radius = 5
+        super().__init__(pos, BigBoss.imgs_close, 0.5)
         self.life = self.max_life = 50
         self.points = self.max_life * 2000
         self.color = GREY
@@ -552,7 +643,7 @@ class BigBoss(Enemy):
         HitFlash.color_sky = PURPLE
         HitFlash.color_stars = FLESH
         Background.color = PURPLE
-        ParticleStarField.color = FLESH
+        StarField.color = FLESH
 
         self.show_lifebar = True
 
@@ -591,24 +682,26 @@ class BigBoss(Enemy):
     def destroy(self):
         self.phase2 = False
         self.dying = True
-        self.death_time = time()
+        self.death_time = now()
 
     def _destroy(self):
         HitFlash.color_sky = BLACK
         Background.color = BLACK
         HitFlash.color_stars = BLUE
-        ParticleStarField.color = BLUE
+        StarField.color = BLUE
         self.remove()
 
-    def collide_with(self, entity):
-        if not self.starting and not self.dying:
-            hit_ship = isinstance(entity, Ship)
-            self.radius = 15 if hit_ship else 5
-            if not self.phase2 and not hit_ship:
-                return False
-            result = super().collide_with(entity)
-            return result
-        return False
+    bullet_radius = 5
+    ship_radius = 15
+
+    @property
+    def ship_collision(self):
+        return not self.starting and not self.dying
+
+    @property
+    def bullet_collision(self):
+        # Eye is only vulnerable once the towerguns are destroyed
+        return self.phase2 and not self.starting and not self.dying
 
     def get_targets(self, num):
         targets = []
@@ -639,7 +732,7 @@ class BigBoss(Enemy):
     def start_wink(self, delay=0.5):
         self.is_winking = True
         self.frames = BigBoss.imgs_open
-        Delay(self.stop_wink, delay=delay)
+        Scheduler.schedule(self.stop_wink, delay=delay, owner=self)
 
     def stop_wink(self):
         self.is_winking = False
@@ -655,14 +748,14 @@ class BigBoss(Enemy):
             if since_birth <= 5:  # Waiting boss
                 if not int(round(since_birth % 0.3, 2) * 10):
                     Background.color = PURPLE
-                    ParticleStarField.color = FLESH
+                    StarField.color = FLESH
                 else:
                     Background.color = BLACK
-                    ParticleStarField.color = BLUE
+                    StarField.color = BLUE
             else:  # boss is here
                 px.play(CHAN_SPAWN, 11)  #  spawn sound
                 Background.color = PURPLE
-                ParticleStarField.color = FLESH
+                StarField.color = FLESH
                 self.starting = False
                 self.phase0 = True
                 self.birth = t
@@ -675,8 +768,8 @@ class BigBoss(Enemy):
             since_death = t - self.death_time
             if since_death >= 3.6:  #  final explosion
                 px.playm(0)
-                Delay(lambda: HitFlash(self.pos), delay=1.25)
-                Delay(lambda: BigExplosion(self.pos), delay=1.25)
+                Scheduler.schedule(lambda: HitFlash(self.pos), delay=1.25)
+                Scheduler.schedule(lambda: BigExplosion(self.pos), delay=1.25)
                 self._destroy()
             elif not int(round(since_death % 0.4, 2) * 10):  # boss is imploding
                 x = random.uniform(-20, 20)
@@ -710,11 +803,7 @@ class BigBoss(Enemy):
                     t - self.delay_shoot >= 2 and self.target.alive
                 ):  # not game.end_game:
                     self.start_wink()
-                    for a in range(16):
-                        vel_b = v2(0, 1)
-                        vel_b = vel_b.rotate(a * 22.5)  # 22.5 = 360 / 16
-                        vel_b *= 40
-                        EnBullet(self.pos, vel_b, col=1)
+                    self.pattern.fire(self.pos)
                     self.delay_shoot = t
 
             # Move
@@ -766,7 +855,7 @@ class BigBoss(Enemy):
 
         # Life bar
         if self.show_lifebar:
-            p1 = v2((WIDTH - 102) // 2, 3) + Entity.offset
+            p1 = v2((WIDTH - 102) // 2, 3)
             p2 = v2(101, 3)
             px.rect(*p1, *p2, BLUE)
             p3 = p1 + v2(1, 1)
@@ -1,26 +1,35 @@
-import pyxel as px
-from time import time
+import backend as px
+from clock import now
 
-from constants import WIDTH, HEIGHT
+from constants import WIDTH, HEIGHT, STAR_FIELD, LEVEL_PACK
 
 from army import Army
+import level_pack
 from ship import Ship
 from enemies import Enemy
-from bullets import EnBullet
-from gfx import ParticleStarField
+from bullets import Bullet, EnBullet
+from gfx import ParticleStarField, TiledStarField, ParticlesExplosion
 from gamestates import GameStateIntro, GameStateStart, GameStateVictory
+from base import Registry, Updatable
+from utils import Scheduler
+from profiler import Profiler, timed
+from pool import Pool
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, levels=LEVEL_PACK):
+        Pool.prewarm_all()
 
         self.score = 0
         self.lives = 3
         self.ship = Ship()
-        self.star_field = ParticleStarField()
+        if STAR_FIELD == "tiles":
+            self.star_field = TiledStarField()
+        else:
+            self.star_field = ParticleStarField()
 
         self.won_game = False
-        self.army = Army()
+        self.army = Army(level_pack.load(levels))
 
         self.state = GameStateIntro(self)
         # self.state = GameStateVictory(self)
@@ -30,17 +39,37 @@ class Game:
         self.score = 0
         self.lives = 3
         self.army.start_war()
-        self.time_start = time()
-        self.time_spawn = self.time_start
+        self.time_start = now()
 
+    def step(self, dt, t):
+        # One simulation step
+        Scheduler.run(t)
+        self.state.update(dt, t)
+        self.state = self.state.get_next_state()
+        Registry.flush_all()  # Apply the frame adds and removes
+        Pool.recycle_all()
+        if Profiler.enabled:
+            Profiler.end_frame(self.counts())
+
+    def counts(self):
+        # Live entities, for the profiler
+        particles = len(ParticlesExplosion.system) + len(self.star_field)
+        return {
+            "upd": len(Updatable.updatables),
+            "en": len(Enemy.enemies),
+            "bul": len(Bullet.bullets),
+            "enb": EnBullet.field.count,
+            "part": particles,
+        }
+
+    @timed("spawn")
     def spawn(self, t):
-        time_past = t - self.time_spawn
-        if self.army.delay is None:
+        army = self.army
+        if army.is_deployed():
             if not len(Enemy.enemies):
-                self.army.get_troop()
-                self.time_spawn = t
-        elif time_past >= self.army.delay:
-            soldier = self.army.get_soldier()
-            if hasattr(soldier, "target"):
-                soldier.set_target(self.ship)
-            self.time_spawn = t
+                army.get_troop(t)
+        else:
+            for event in army.due(t):
+                soldier = event.create()
+                if event.aims:
+                    soldier.set_target(self.ship)
@@ -1,26 +1,49 @@
-from time import time
+from clock import now
 from abc import ABC, abstractmethod
 
-import pyxel as px
+import numpy as np
+import backend as px
 
-from vector import Vector as v2
+from vector import Vec2 as v2
 from constants import *
 
 from ship import Ship
 from bullets import Bullet, EnBullet
 from enemies import Enemy, Boss
+from trajectories import Trajectory
 from scores import ScoresHandler
-from utils import center_txt, Delay
+from utils import center_txt
 from gfx import (
     Background,
-    ParticleStarField,
+    StarField,
     HitFlash,
     HitEffect,
     ParticlesExplosion,
     BigExplosion,
 )
-from base import Updatable, Layer, Entity
+from base import Updatable, Layer, Camera
+from atlas import FRAMES
 from ending import RewardAnim
+from collisions import SpatialHash, circles, hit_matrix, hit_pairs
+from profiler import Profiler, timed
+
+
+@timed("draw back")
+def draw_back():
+    for item in Layer.back:
+        item.draw()
+
+
+@timed("draw main")
+def draw_main():
+    for item in reversed(Layer.main):
+        item.draw()
+
+
+@timed("draw fore")
+def draw_fore():
+    for item in Layer.fore:
+        item.draw()
 
 
 class GameState(ABC):
@@ -44,26 +67,36 @@ class GameState(ABC):
     def get_next_state(self):
         return self._next_state
 
+    def update_entities(self, dt, t):
+        Trajectory.update_all(t)
+        if Profiler.enabled:
+            Profiler.update_all(Updatable.updatables, dt, t)
+        else:
+            for item in Updatable.updatables:
+                item.update(dt, t)
+
     def draw_layers(self):
         px.cls(Background.color)
-        for item in Layer.back:
-            item.draw()
-        for item in reversed(Layer.main):
-            item.draw()
-        for item in Layer.fore:
-            item.draw()
+        Camera.apply()
+        draw_back()
+        draw_main()
+        draw_fore()
+        Camera.reset()
 
     def draw_hud(self):
+        Camera.apply()
         # Score on top right
         score = str(self.game.score)
         x = WIDTH - len(score) * 4 - 1
-        pos_txt = v2(x, 2) + Entity.offset
-        px.text(*pos_txt, score, WHITE)
+        px.text(x, 2, score, WHITE)
 
         # Lives on top left
         for i in range(self.game.lives):
-            pos_txt = v2(2 + i * 8, 2) + Entity.offset
-            px.blt(*pos_txt, 0, 0, 19, 7, 5, colkey=BLACK)
+            px.blt(2 + i * 8, 2, *FRAMES["life"].args)
+        Camera.reset()
+
+        if Profiler.enabled:
+            Profiler.draw()
 
 
 class GameStateIntro(GameState):
@@ -75,17 +108,16 @@ class GameStateIntro(GameState):
         if px.btnp(px.KEY_X):
             self._next_state = GameStateStart(self.game)
 
-        for item in Updatable.updatables:
-            item.update(dt, t)
+        self.update_entities(dt, t)
 
     def draw(self):
         px.cls(Background.color)
-        for item in Layer.back:
-            item.draw()
+        draw_back()
 
         # Title
         h = HEIGHT / 32
-        px.blt((WIDTH - 84) // 2, h, 0, 0, 32, 84, 40, colkey=BLACK)
+        title = FRAMES["title"]
+        px.blt((WIDTH - title.w) // 2, h, *title.args)
         author = "by Yuiio"
         px.text((WIDTH - len(author) * 4) // 2, h + 38, author, CYAN)
 
@@ -102,6 +134,8 @@ class GameStateIntro(GameState):
 
 class GameStateStart(GameState):
     def on_enter(self):
+        self.enemy_grid = SpatialHash()
+        self.bullet_grid = SpatialHash()
         px.stop()
         px.playm(3, loop=True)
         self.game.start()
@@ -121,34 +155,63 @@ class GameStateStart(GameState):
             self.game.score += enemy.points
             enemy.destroy()
 
-    def update(self, dt, t):
-        for item in Updatable.updatables:
-            item.update(dt, t)
-
-        # Handle collisions
-        # for bullet in EnBullet.bullets.copy():
-        for bullet in reversed(EnBullet.bullets):
-            if bullet.collide_with(self.game.ship):
-                bullet.remove()
-                self.hit_ship()
-                break
-
-        # for enemy in Enemy.enemies.copy():
-        for enemy in reversed(Enemy.enemies):
-            # for bullet in Bullet.bullets.copy():
-            for bullet in reversed(Bullet.bullets):
-                # Memo : sometime enemy has its own collide_with function
-                if enemy.collide_with(bullet):
-                    self.hit_enemy_with(enemy, bullet)
-                    bullet.remove()
+    @timed("collisions")
+    def handle_collisions(self):
+        ship = self.game.ship
+
+        hit = EnBullet.field.collide_with(ship)
+        if hit >= 0:
+            EnBullet.field.remove(hit)
+            self.hit_ship()
+
+        enemies = Enemy.enemies.copy()
+        if not enemies:
+            return
+        n = len(enemies)
+        centers, radii = circles(enemies, "bullet_radius")
+        bullets = Bullet.bullets.copy()
+        touching = {}  # Enemy index -> bullets indexes touching it, ascending
+        if bullets:
+            hit_e, hit_b = hit_pairs(
+                centers,
+                radii,
+                *circles(bullets),
+                self.enemy_grid,
+                self.bullet_grid,
+            )
+            enabled = np.fromiter((e.bullet_collision for e in enemies), bool, n)
+            keep = enabled[hit_e]
+            for e, b in zip(hit_e[keep].tolist(), hit_b[keep].tolist()):
+                touching.setdefault(e, []).append(b)
+        used = set()  # One bullet, one hit
+        ship_radii = np.fromiter((e.ship_radius for e in enemies), float, n)
+        ship_hits = hit_matrix(centers, ship_radii, *circles([ship]))[:, 0]
+        ship_hits &= np.fromiter((e.ship_collision for e in enemies), bool, n)
+        ship_hits = ship_hits.tolist()
+
+        for i in range(n - 1, -1, -1):
+            enemy = enemies[i]
+            # Newest bullet first
+            for b in reversed(touching.get(i, ())):
+                if b not in used:
+                    used.add(b)
+                    self.hit_enemy_with(enemy, bullets[b])
                     break
-            if enemy.collide_with(self.game.ship):
+            if ship_hits[i]:
                 # Make sure enemy has not been killed by "the" previous bullet
                 if enemy in Enemy.enemies:
-                    self.hit_enemy_with(enemy, self.game.ship)
+                    self.hit_enemy_with(enemy, ship)
                     self.hit_ship()
                 break
 
+        for bullet in [bullets[b] for b in sorted(used)]:
+            bullet.remove()
+
+    def update(self, dt, t):
+        self.update_entities(dt, t)
+
+        self.handle_collisions()
+
         # Loose ?
         if not self.game.lives:
             self.game.ship.alive = False
@@ -167,7 +230,7 @@ class GameStateStart(GameState):
 
 class GameStateShipDestroyed(GameState):
     def on_enter(self):
-        self.start_time = time()
+        self.start_time = now()
         self.game.ship.destroy()
         px.playm(0)
 
@@ -175,7 +238,7 @@ class GameStateShipDestroyed(GameState):
         HitFlash.color_sky = BLACK
         HitFlash.color_stars = BLUE
         Background.color = BLACK
-        ParticleStarField.color = BLUE
+        StarField.color = BLUE
 
         # Scores
         ScoresHandler.update(self.game.score)
@@ -183,8 +246,7 @@ class GameStateShipDestroyed(GameState):
 
     def update(self, dt, t):
 
-        for item in Updatable.updatables:
-            item.update(dt, t)
+        self.update_entities(dt, t)
 
         # Wait explosions end before cleaning
         if t - self.start_time >= 5:  # 3.6 -> end exploxion
@@ -210,12 +272,11 @@ class GameStateShipExiting(GameState):
         self.game.ship.stop_update()
 
     def is_exit_over(self):
-        return not (len(self.game.star_field.particles) or self.game.ship.pos.y > -7)
+        return self.game.star_field.is_empty() and self.game.ship.pos.y <= -7
 
     def update(self, dt, t):
 
-        for item in Updatable.updatables:
-            item.update(dt, t)
+        self.update_entities(dt, t)
         self.game.ship.exiting(dt)
 
         if self.is_exit_over():
@@ -232,7 +293,7 @@ class GameStateEndLivesBonus(GameState):
         self.game.score += self.game.lives * 10000
         ScoresHandler.update(self.game.score)
         ScoresHandler.save()
-        self.bonus_start = time()
+        self.bonus_start = now()
 
     def update(self, dt, t):
         if t - self.bonus_start >= 3:
@@ -247,27 +308,29 @@ class GameStateEndLivesBonus(GameState):
         bonus = str(self.game.lives * 10000)
         x = (WIDTH - (self.game.lives * 8 + len(t) * 4 + len(bonus) * 4)) / 2
         for i in range(self.game.lives):
-            px.blt(x + i * 8, y + 8, 0, 0, 19, 7, 5, colkey=BLACK)
+            px.blt(x + i * 8, y + 8, *FRAMES["life"].args)
         txt = t + bonus
         px.text(x + 8 * self.game.lives, y + 8, txt, WHITE)
 
 
 class GameStateVictory(GameState):
     def on_enter(self):
-        Entity.offset = v2(0, HEIGHT)
+        Camera.scroll_y = HEIGHT
         self.end_anim = RewardAnim()
         self.end_anim.start()
 
     def update(self, dt, t):
 
-        if Entity.offset.y > 0:
-            Entity.offset += v2(0, -100) * dt
+        if Camera.scroll_y > 0:
+            Camera.scroll_y -= 100 * dt
         else:
-            Entity.offset = v2()
+            Camera.scroll_y = 0
             if px.btnp(px.KEY_X):
                 self._next_state = GameStateIntro(self.game)
         self.end_anim.update(dt, t)
 
     def draw(self):
         px.cls(BLACK)
+        Camera.apply()
         self.end_anim.draw()
+        Camera.reset()
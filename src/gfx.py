@@ -1,11 +1,15 @@
-from random import uniform, randint
-from time import time
+from random import uniform
+from weakref import WeakSet
+from abc import abstractmethod
+from clock import now
 
-import pyxel as px
+import numpy as np
+import backend as px
 
 from constants import *
-from vector import Vector as v2
-from base import Entity, Updatable, Drawable, Layer
+from vector import Vec2 as v2
+from base import Camera, Entity, Updatable, Drawable, Layer
+from quality import Quality, LEVELS
 
 
 class Background:
@@ -13,52 +17,173 @@ class Background:
 
 
 class Shaker(Updatable):
-    """class to shake the screen"""
+    """class to shake the screen, through the camera"""
 
     def __init__(self, amount=2, duration=0.15):
         self.start_update()
-        self.amount = amount
+        self.amount = amount * Quality.settings["shake"]
         self.duration = duration
-        self.birth = time()
+        self.birth = now()
 
     def update(self, dt, t):
         if t - self.birth < self.duration:
-            Entity.offset = v2(
-                uniform(-1, 1) * self.amount, uniform(-1, 1) * self.amount
-            )
+            Camera.shake_x = uniform(-1, 1) * self.amount
+            Camera.shake_y = uniform(-1, 1) * self.amount
         else:
-            Entity.offset = v2(0, 0)
+            Camera.shake_x = Camera.shake_y = 0
             self.stop_update()
 
 
-class Particle(Entity):
-
-    sizes = {1: v2(0, 0), 2: v2(0, 1), 3: v2(1, 1)}
-
-    def __init__(self, pos, size, vel, acc, duration, color):
-        super().__init__(pos, radius=size)
-        self.vel = vel
-        self.acc = acc
-        self.lifespan = self.duration = duration
-        self.color = color
+class ParticleBudget:
+    """Caps the live particles, across all the particle systems.
+
+    A burst that would exceed the budget is merged into a burst emitted
+    nearby during the same frame, or else gets fewer particles and, far
+    over budget, a shorter lifetime. Degradations are counted in stats.
+    """
+
+    limit = PARTICLE_BUDGET
+    merge_distance = 8
+    min_count = 8
+    systems = WeakSet()
+    bursts = []  # Positions of the bursts of the frame
+    frame_time = None
+    stats = {"merged": 0, "reduced": 0, "shortened": 0}
+
+    @classmethod
+    def live(cls):
+        return sum(len(system) for system in cls.systems)
+
+    @classmethod
+    def reset_stats(cls):
+        for key in cls.stats:
+            cls.stats[key] = 0
+
+    @classmethod
+    def allow(cls, pos, count, duration):
+        """Count and duration of a burst, None when merged into another"""
+        t = now()
+        if t != cls.frame_time:
+            cls.frame_time = t
+            cls.bursts.clear()
+
+        room = cls.limit - cls.live()
+        if count > room:
+            reach = cls.merge_distance**2
+            for other in cls.bursts:
+                if pos.dist_sq(other) <= reach:
+                    cls.stats["merged"] += 1
+                    return None
+            scale = max(room, 0) / count
+            count = max(cls.min_count, int(count * scale))
+            cls.stats["reduced"] += 1
+            if scale < 0.5:  # Far over budget, make room sooner
+                duration *= max(scale * 2, 0.25)
+                cls.stats["shortened"] += 1
+
+        cls.bursts.append(pos.copy())
+        return count, duration
+
+
+class ParticleSystem(Updatable, Drawable):
+    """Particles stored as a structure of arrays.
+
+    Positions, velocities, accelerations, lifespans, sizes and colors live
+    in contiguous numpy arrays: integrating and culling every particle is
+    one vectorized step. Given a layer, the system updates and draws itself
+    while it has particles, otherwise its owner drives it.
+    """
+
+    rng = np.random.default_rng()
+    dims = np.array(((0, 0), (0, 0), (0, 1), (1, 1)))  # Rect w, h per size
+
+    @classmethod
+    def seed(cls, value):
+        cls.rng = np.random.default_rng(value)
+
+    def __init__(self, layer=None, capacity=256):
+        self.home = layer
+        self.pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.acc = np.zeros((capacity, 2))
+        self.life = np.zeros(capacity)
+        self.size = np.zeros(capacity, dtype=np.int8)
+        self.col = np.zeros(capacity, dtype=np.int8)
+        self.count = 0
+        self.active = False
+        ParticleBudget.systems.add(self)
+
+    def __len__(self):
+        return self.count
+
+    def grow(self):
+        capacity = len(self.pos) * 2
+        for name in ("pos", "vel", "acc", "life", "size", "col"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[: self.count] = old[: self.count]
+            setattr(self, name, new)
+
+    def emit(self, pos, vel, acc, life, size, col):
+        """Add len(vel) particles, the other values are broadcast"""
+        n = len(vel)
+        while self.count + n > len(self.pos):
+            self.grow()
+        new = slice(self.count, self.count + n)
+        self.pos[new] = pos
+        self.vel[new] = vel
+        self.acc[new] = acc
+        self.life[new] = life
+        self.size[new] = size
+        self.col[new] = col
+        self.count += n
+        if self.home is not None and not self.active:
+            self.start_update()
+            self.set_draw_layer(self.home)
+            self.active = True
+
+    def keep(self, mask):
+        """Keep only the particles selected by mask, preserving their order"""
+        n = int(mask.sum())
+        for name in ("pos", "vel", "acc", "life", "size", "col"):
+            array = getattr(self, name)
+            array[:n] = array[: self.count][mask]
+        self.count = n
+
+    def clear(self):
+        self.count = 0
+        if self.active:
+            self.deactivate()
+
+    def deactivate(self):
+        self.stop_draw()
+        self.stop_update()
+        self.active = False
 
-    @property
-    def is_dead(self):
-        return True if self.lifespan <= 0 else False
+    def integrate(self, dt):
+        n = self.count
+        self.life[:n] -= dt
+        self.vel[:n] += self.acc[:n]
+        self.pos[:n] += self.vel[:n] * dt
 
-    def update(self, dt):
-        self.lifespan -= dt
-        self.vel += self.acc
-        self.pos += self.vel * dt
+    def update(self, dt, t):
+        self.integrate(dt)
+        self.keep(self.life[: self.count] > 0)
+        if not self.count:
+            self.deactivate()
 
     def draw(self):
-        pos = self.pos + Entity.offset
-        # dim = pos + Particle.sizes[self.radius]
-        dim = Particle.sizes[self.radius]
-        px.rect(*pos, *dim, self.color)
+        n = self.count
+        xs = self.pos[:n, 0].tolist()
+        ys = self.pos[:n, 1].tolist()
+        dims = self.dims[self.size[:n]].tolist()
+        cols = self.col[:n].tolist()
+        for x, y, (w, h), col in zip(xs, ys, dims, cols):
+            px.rect(x, y, w, h, col)
 
 
-class ParticleStarField(Updatable, Drawable):
+class StarField(Updatable, Drawable):
+    """Stars scrolling down in the back, all of StarField.color"""
 
     color = BLUE
 
@@ -66,102 +191,211 @@ class ParticleStarField(Updatable, Drawable):
 
         self.start_update()
         self.set_draw_layer(Layer.back)
-        self.particles = []
         self.never_ending = True
 
-        for _ in range(50):
-            self.add_particle()
-
     def stop(self):
-        acc = v2(0, -4)
-        for p in self.particles:
-            p.acc = acc
+        # The stars fly away upward, no new ones
         self.never_ending = False
 
     def start(self):
-        self.particles.clear()
         self.never_ending = True
-        for _ in range(50):
-            self.add_particle()
+        if self not in self.updatables:  # Removed after the last stop
+            self.start_update()
+            self.set_draw_layer(Layer.back)
 
     def remove(self):
         self.stop_draw()
         self.stop_update()
 
-    def _add_particle(self, pos):
-        size = randint(1, 3)
-        pos = pos
-        vel = v2(0, randint(100, 200))
-        acc = v2()
+    @abstractmethod
+    def is_empty(self):
+        # No star left on screen
+        pass
 
-        self.particles.append(Particle(pos, size, vel, acc, 2, self.color))
+    @abstractmethod
+    def __len__(self):
+        # Live particles
+        pass
 
-    def add_particle(self):
-        pos = v2(randint(0, WIDTH), randint(0, HEIGHT))
-        self._add_particle(pos)
 
-    def add_top_particle(self):
-        pos = v2(randint(0, WIDTH), -3)
-        self._add_particle(pos)
+class ParticleStarField(StarField):
+    """One particle by star"""
 
-    def p_is_dead(self, p):
-        return True if p.pos.y > HEIGHT + 3 or p.pos.y < -3 else False
+    def __init__(self):
+        super().__init__()
+        self.particles = ParticleSystem()
+        self.add_particles(Quality.settings["stars"])
+
+    def stop(self):
+        self.particles.acc[: len(self.particles)] = 0, -4
+        super().stop()
+
+    def start(self):
+        self.particles.clear()
+        self.add_particles(Quality.settings["stars"])
+        super().start()
+
+    def is_empty(self):
+        return not len(self.particles)
+
+    def __len__(self):
+        return len(self.particles)
+
+    def _add_particles(self, x, y):
+        rng = ParticleSystem.rng
+        n = len(x)
+        size = rng.integers(1, 4, n)
+        vel = np.zeros((n, 2))
+        vel[:, 1] = rng.integers(100, 201, n)
+        self.particles.emit(np.column_stack((x, y)), vel, 0, 2, size, self.color)
+
+    def add_particles(self, n):
+        rng = ParticleSystem.rng
+        self._add_particles(
+            rng.integers(0, WIDTH + 1, n), rng.integers(0, HEIGHT + 1, n)
+        )
+
+    def add_top_particles(self, n):
+        self._add_particles(
+            ParticleSystem.rng.integers(0, WIDTH + 1, n), np.full(n, -3)
+        )
 
     def update(self, dt, t):
-        if len(self.particles):
-            for p in self.particles.copy():
-                p.update(dt)
-                p.color = self.color
-                if self.p_is_dead(p):
-                    self.particles.remove(p)
-                    del p
-                    if self.never_ending:
-                        self.add_top_particle()
+        particles = self.particles
+        if len(particles):
+            particles.integrate(dt)
+            n = len(particles)
+            particles.col[:n] = self.color
+            y = particles.pos[:n, 1]
+            dead = (y > HEIGHT + 3) | (y < -3)
+            if dead.any():
+                particles.keep(~dead)
+            if self.never_ending:
+                # Dead stars are replaced up to the count of the quality level
+                missing = Quality.settings["stars"] - len(particles)
+                if missing > 0:
+                    self.add_top_particles(missing)
         else:
             self.remove()
 
     def draw(self):
-        for p in self.particles:
-            p.draw()
+        self.particles.draw()
 
 
-class ParticlesExplosion(Updatable, Drawable):
-    def __init__(self, pos, color=GREEN, duration=0.5, acceleration=-0.5):
+class TiledStarField(StarField):
+    """Parallax strips of stars pre-rendered in STARS_BANK, scrolled with
+    a few blits by frame. The stars are drawn in WHITE in the strips, and
+    mapped to StarField.color with the palette.
+    """
 
-        self.start_update()
-        self.set_draw_layer(Layer.fore)
+    speeds = (100, 150, 200)  # By strip, in pixels/s
+    strip_h = 80
+    # By strip. The particle field has 50 stars, only the third of them of
+    # size 3 shows a pixel: about 17 on screen, as 3 strips of 4 stars seen
+    # 1.5 times each in the height of the screen
+    stars = 4
 
-        self.particles = []
-        for _ in range(40):
-            size = randint(1, 3)
-            dist = randint(60, 80)  # distance per seconds
-            vel = v2(dist, 0)
-            vel = vel.rotate(uniform(0, 360))
-            acc = vel.normalize() * acceleration  # deceleration
-            self.particles.append(Particle(pos, size, vel, acc, duration, color))
+    def __init__(self):
+        super().__init__()
+        self.render_strips()
+        self.reset()
+
+    def render_strips(self):
+        image = px.image(STARS_BANK)
+        image.rect(0, 0, WIDTH, self.strip_h * len(self.speeds), BLACK)
+        rng = np.random.default_rng(0)  # Always the same sky
+        for n in range(len(self.speeds)):
+            xs = rng.integers(0, WIDTH, self.stars)
+            ys = rng.integers(0, self.strip_h, self.stars)
+            for x, y in zip(xs, ys):
+                image.pset(int(x), n * self.strip_h + int(y), WHITE)
+
+    def reset(self):
+        self.vel = [float(speed) for speed in self.speeds]
+        self.scroll = [0.0] * len(self.speeds)
+        # Moves since the stop, and lowest one: the stars pushed out at the
+        # bottom are gone, the strips are clipped to the ones left
+        self.shift = [0.0] * len(self.speeds)
+        self.lowest = [0.0] * len(self.speeds)
 
-    def remove(self):
-        self.stop_draw()
-        self.stop_update()
+    def start(self):
+        self.reset()
+        super().start()
 
-    def update(self, dt, t=None):
-        if len(self.particles):
-            for p in self.particles:
-                p.update(dt)
-                if p.is_dead:
-                    self.particles.remove(p)
-                    del p
-        else:
+    def __len__(self):
+        return 0  # Stars are pixels of the strips, not particles
+
+    def is_empty(self):
+        if self.never_ending:
+            return False
+        return all(bottom <= top for top, bottom in self.windows())
+
+    def windows(self):
+        # Screen part of the stars left, by strip
+        for shift, lowest in zip(self.shift, self.lowest):
+            yield max(0, int(shift)), min(HEIGHT, int(HEIGHT + shift - lowest))
+
+    def update(self, dt, t):
+        if self.is_empty():
             self.remove()
+            return
+        for n, vel in enumerate(self.vel):
+            if not self.never_ending:
+                vel = self.vel[n] = vel - 4  # As the particles acceleration
+                self.shift[n] += vel * dt
+                self.lowest[n] = max(self.lowest[n], self.shift[n])
+            self.scroll[n] = (self.scroll[n] + vel * dt) % self.strip_h
 
     def draw(self):
-        for p in self.particles:
-            p.draw()
+        strip_h = self.strip_h
+        # Fewer strips at lower quality
+        strips = len(self.speeds) * Quality.settings["stars"] // LEVELS[0]["stars"]
+        px.pal(WHITE, self.color)
+        windows = list(self.windows())
+        for n in range(max(1, strips)):
+            if not self.never_ending:
+                top, bottom = windows[n]
+                if bottom <= top:
+                    continue
+                px.clip(0, top, WIDTH, bottom - top)
+            y = self.scroll[n] - strip_h
+            while y < HEIGHT:
+                px.blt(0, y, STARS_BANK, 0, n * strip_h, WIDTH, strip_h, BLACK)
+                y += strip_h
+        px.clip()
+        px.pal()
+
+
+class ParticlesExplosion:
+    """A burst of particles, in the explosions system shared by all"""
+
+    system = ParticleSystem(Layer.fore)
+
+    @classmethod
+    def clear_all(cls):
+        cls.system.clear()
+
+    def __init__(
+        self, pos, color=GREEN, duration=0.5, acceleration=-0.5, speed=1, count=40
+    ):
+        count = max(1, int(count * Quality.settings["explosion"]))
+        allowed = ParticleBudget.allow(pos, count, duration)
+        if allowed is None:
+            return
+        count, duration = allowed
+        rng = ParticleSystem.rng
+        size = rng.integers(1, 4, count)
+        dist = rng.integers(60, 81, count) * speed  # distance per seconds
+        angle = np.radians(rng.uniform(0, 360, count))
+        direc = np.column_stack((np.cos(angle), np.sin(angle)))
+        vel = direc * dist[:, np.newaxis]
+        acc = direc * acceleration  # deceleration
+        self.system.emit((pos.x, pos.y), vel, acc, duration, size, color)
 
 
 class HitFlash(Entity, Updatable, Drawable):
 
-    color_stars = ParticleStarField.color
+    color_stars = StarField.color
     color_sky = Background.color
 
     def __init__(self, pos, color=WHITE):
@@ -170,7 +404,7 @@ class HitFlash(Entity, Updatable, Drawable):
         self.start_update()
         self.set_draw_layer(Layer.back)
 
-        self.birth = time()
+        self.birth = now()
         self.has_started = False
         self.visible = False
         self.color = color
@@ -178,7 +412,7 @@ class HitFlash(Entity, Updatable, Drawable):
         Shaker()
         # Start flash
         Background.color = self.color
-        ParticleStarField.color = WHITE
+        StarField.color = WHITE
 
     def remove(self):
         self.stop_draw()
@@ -189,72 +423,48 @@ class HitFlash(Entity, Updatable, Drawable):
         if not self.has_started:
             # Stop flash
             Background.color = self.color = self.color_sky
-            ParticleStarField.color = self.color_stars
+            StarField.color = self.color_stars
             self.has_started = True
 
         if t > self.birth + 0.1:  # duration
             self.remove()
 
     def draw(self):
-        pos = self.pos + Entity.offset
+        pos = self.pos
 
         offx = uniform(-1, 1) * 3
         offy = uniform(-1, 1) * 3
         p1 = pos - v2(self.radius * offx / 2, self.radius * offy / 2)
         p2 = pos + v2(offx, offy)
-        px.circ(*pos, self.radius, WHITE)
-        px.circ(*p2, self.radius - 2, Background.color)
+        if Quality.settings["flash_circles"]:
+            px.circ(*pos, self.radius, WHITE)
+            px.circ(*p2, self.radius - 2, Background.color)
         px.line(*pos, *p1, WHITE)
 
 
-class BigExplosion(Updatable, Drawable):
+class BigExplosion:
+    # Tuned when its explosions were updated twice a frame: twice the speed,
+    # four times the acceleration and half the duration give the same look.
     def __init__(self, pos):
-
-        self.start_update()
-        self.set_draw_layer(Layer.fore)
-
-        self.explosions = [
-            ParticlesExplosion(pos, duration=1, acceleration=2, color=PURPLE),
-            ParticlesExplosion(pos, duration=1, acceleration=2, color=BLUE),
-            ParticlesExplosion(pos, duration=3, acceleration=-0.35, color=WHITE),
-            ParticlesExplosion(pos, duration=3, acceleration=-0.35, color=CYAN),
-        ]
-
-    def remove(self):
-        self.stop_draw()
-        self.stop_update()
-
-    def update(self, dt, t):
-        for e in self.explosions.copy():
-            e.update(dt)
-            if len(e.particles) == 0:
-                self.explosions.remove(e)
-        if len(self.explosions) == 0:
-            self.remove()
-
-    def draw(self):
-        for e in self.explosions:
-            e.draw()
+        ParticlesExplosion(pos, PURPLE, duration=0.5, acceleration=8, speed=2)
+        ParticlesExplosion(pos, BLUE, duration=0.5, acceleration=8, speed=2)
+        ParticlesExplosion(pos, WHITE, duration=1.5, acceleration=-1.4, speed=2)
+        ParticlesExplosion(pos, CYAN, duration=1.5, acceleration=-1.4, speed=2)
 
 
 class HitEffect(Updatable):
 
-    explosions = []
+    hits = []  # Position and color of the hits of the frame
 
     def __init__(self, pos, color=WHITE):
-
-        explosion = ParticlesExplosion(pos, color=color)
-        explosion.stop_update()
-        explosion.stop_draw()
-        self.explosions.append(explosion)
+        self.hits.append((pos.copy(), color))
         HitFlash(pos, color)
         self.start_update()
 
     def update(self, dt, t):
         # Fire only the last explosions
-        if len(self.explosions):
-            last_explosion = self.explosions[-1]
-            last_explosion.start_update()
-            last_explosion.start_draw()
-            self.explosions.clear()
+        if len(self.hits):
+            pos, color = self.hits[-1]
+            ParticlesExplosion(pos, color=color)
+            self.hits.clear()
         self.stop_update()
@@ -0,0 +1,106 @@
+"""Run the game headless, without window nor sound.
+
+The game is stepped on its own simulation clock as fast as possible, a
+run with the same seed and bot is replayed identically. For profiling,
+soak tests and bots:
+
+    runner = HeadlessRunner(seed=1)
+    runner.run(3600, bot=random_bot)
+
+Usage : python headless.py [--frames N] [--seed S]
+"""
+
+import argparse
+import random
+from time import perf_counter
+
+import backend as px
+import clock
+from constants import LEVEL_PACK
+from base import Camera, Registry
+from bullets import EnBullet
+from enemies import En2, Sider
+from trajectories import Trajectory
+from gfx import ParticleSystem, ParticlesExplosion, ParticleBudget
+from utils import Scheduler
+from pool import Pool
+from quality import Quality
+from game import Game
+
+
+def reset_world():
+    """Forget every game object, to start again from a clean state"""
+    EnBullet.clear_all()
+    Trajectory.clear_all()
+    ParticlesExplosion.clear_all()
+    for registry in Registry.registries:
+        registry.clear()
+    Registry.flush_all()
+    Scheduler.clear()
+    Camera.clear()
+    ParticleBudget.reset_stats()
+    Quality.reset()  # Full quality, benchmarks compare the same work
+    for pool in Pool.pools:  # Statistics of this run only
+        pool.released.clear()
+        pool.live = pool.hits = pool.misses = pool.high_water = 0
+    for cls in (En2, Sider):  # Shared animations
+        cls.prev_t = 0
+        cls.common_frame = 0
+
+
+def random_bot(runner):
+    """Always firing, moving at random"""
+    runner.backend.pressed = {
+        px.KEY_X,
+        random.choice((px.KEY_LEFT, px.KEY_RIGHT, px.KEY_UP, px.KEY_DOWN)),
+    }
+
+
+class HeadlessRunner:
+    def __init__(self, seed=None, levels=LEVEL_PACK):
+        self.backend = px.NullBackend()
+        px.use(self.backend)
+        self.clock = clock.Clock()
+        clock.use(self.clock)
+        reset_world()
+        random.seed(seed)
+        ParticleSystem.seed(seed)
+        self.game = Game(levels)
+
+    @property
+    def frame(self):
+        return self.clock.frame
+
+    def step(self):
+        # No real time: one simulation step per call
+        self.clock.advance()
+        self.game.step(self.clock.step, self.clock.t)
+        self.game.state.draw()
+
+    def run(self, frames, bot=None):
+        """Step frames times, bot(runner) is called before each step"""
+        for _ in range(frames):
+            if bot is not None:
+                bot(self)
+            self.step()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless soak test")
+    parser.add_argument("--frames", type=int, default=36000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--levels", default=LEVEL_PACK, help="level pack name")
+    args = parser.parse_args()
+
+    runner = HeadlessRunner(seed=args.seed, levels=args.levels)
+    start = perf_counter()
+    runner.run(args.frames, bot=random_bot)
+    elapsed = perf_counter() - start
+    print(
+        f"{args.frames} frames in {elapsed:.2f} s ({args.frames / elapsed:.0f} fps),"
+        f" state: {type(runner.game.state).__name__}, score: {runner.game.score}"
+    )
+
+
+if __name__ == "__main__":
+    main()
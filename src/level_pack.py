@@ -0,0 +1,223 @@
+"""Level packs: the troops and waves of the army, in the JSON files of the
+levels directory.
+
+A pack is validated and compiled into the army timeline once, then kept
+pickled in the config directory, keyed by the hash of the file: the next
+launches load the timeline without parsing the pack again. The key also
+covers the enemy constructors, the cached timeline holds calls to them.
+
+{
+  "description": "...",
+  "troops": {"name": [{"enemy": "En1", "pos": ["L", 0], "delay": 1.5}, ...]},
+  "waves": [["name", ...], ...]
+}
+
+Delays are in seconds, from the previous soldier of the wave. Position
+coordinates are pixels or one of the ANCHORS names.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import math
+import pickle
+from os.path import dirname, join as path_join
+from numbers import Real
+from time import perf_counter
+
+from constants import WIDTH, HEIGHT
+from vector import Vec2 as v2
+from army import Spawn, Wave
+from enemies import Enemy
+from utils import config_path
+
+log = logging.getLogger(__name__)
+
+LEVELS_DIR = path_join(dirname(__file__), "levels")
+CACHE_FORMAT = 2  # To change with the compiled form
+
+ANCHORS = {
+    "L": WIDTH * 2 / 10,  # Left
+    "C": WIDTH / 2,  # Center (width)
+    "R": WIDTH * 8 / 10,  # Right
+    "T": HEIGHT * 1 / 6,  # Top
+    "M": HEIGHT / 2,  # Middle (height)
+    "B": HEIGHT * 5 / 6,  # Bottom
+    "WIDTH": WIDTH,
+    "HEIGHT": HEIGHT,
+}
+
+
+def load(name):
+    """Timeline of the pack levels/<name>.json, from the cache if valid"""
+    start = perf_counter()
+    path = path_join(LEVELS_DIR, f"{name}.json")
+    with open(path, "rb") as f:
+        source = f.read()
+    key = hashlib.sha256(source + bytes([CACHE_FORMAT]) + fingerprint()).hexdigest()
+    cache = path_join(config_path(), f"levels-{name}.cache")
+
+    timeline = read_cache(cache, key)
+    origin = "cache"
+    if timeline is None:
+        timeline = compile_pack(json.loads(source), path)
+        write_cache(cache, key, timeline)
+        origin = "compiled"
+    log.info(
+        "level pack %s: %d waves, %s in %.1f ms",
+        name,
+        len(timeline),
+        origin,
+        (perf_counter() - start) * 1000,
+    )
+    return timeline
+
+
+def fingerprint():
+    # Spawn parameters and constructor signatures of the enemy types
+    types = sorted(Enemy.types.items())
+    return repr(
+        [(name, cls.spawn_params, str(inspect.signature(cls))) for name, cls in types]
+    ).encode()
+
+
+def read_cache(cache, key):
+    try:
+        with open(cache, "rb") as f:
+            cached_key, timeline = pickle.load(f)
+    except (
+        OSError,
+        pickle.UnpicklingError,
+        AttributeError,
+        ImportError,
+        TypeError,
+        ValueError,
+        EOFError,
+    ):
+        return None  # Missing, or written by another version of the code
+    return timeline if cached_key == key else None
+
+
+def write_cache(cache, key, timeline):
+    try:
+        with open(cache, "wb") as f:
+            pickle.dump((key, timeline), f, pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        log.warning("level pack cache not written: %s", e)
+
+
+# Validation
+
+
+def validate(data, path):
+    """Raise ValueError on the first mistake of the pack"""
+
+    def fail(where, msg):
+        raise ValueError(f"{path}: {where}: {msg}")
+
+    if not isinstance(data, dict):
+        fail("pack", "not an object")
+    troops = data.get("troops")
+    waves = data.get("waves")
+    if not isinstance(troops, dict) or not troops:
+        fail("troops", "object of troops expected")
+    if not isinstance(waves, list) or not waves:
+        fail("waves", "list of waves expected")
+
+    for name, soldiers in troops.items():
+        if not isinstance(soldiers, list) or not soldiers:
+            fail(f"troop {name}", "list of soldiers expected")
+        for n, soldier in enumerate(soldiers):
+            validate_soldier(soldier, lambda msg: fail(f"troop {name}[{n}]", msg))
+
+    for n, wave in enumerate(waves):
+        if not isinstance(wave, list) or not wave:
+            fail(f"wave {n}", "list of troop names expected")
+        for name in wave:
+            if not isinstance(name, str) or name not in troops:
+                fail(f"wave {n}", f"unknown troop {name!r}")
+
+
+def validate_soldier(soldier, fail):
+    if not isinstance(soldier, dict):
+        fail("object expected")
+    enemy = soldier.get("enemy")
+    known = [name for name, cls in Enemy.types.items() if cls.spawn_params]
+    if enemy not in known:
+        fail(f"unknown enemy {enemy!r}, one of {', '.join(known)}")
+    required, optional = Enemy.types[enemy].spawn_fields()
+
+    for field in required:
+        if field not in soldier:
+            fail(f"{enemy} needs {field!r}")
+    unknown = set(soldier) - {"enemy", "delay"} - set(required) - set(optional)
+    if unknown:
+        fail(f"unknown fields {sorted(unknown)} for {enemy}")
+
+    delay = soldier.get("delay")
+    if not is_number(delay) or delay < 0:
+        fail("delay must be a finite number >= 0")
+    for field in ("pos", "destination"):
+        if field in soldier:
+            pos = soldier[field]
+            if not (
+                isinstance(pos, list)
+                and len(pos) == 2
+                and all(
+                    isinstance(c, str) and c in ANCHORS or is_number(c) for c in pos
+                )
+            ):
+                fail(f"{field} must be [x, y], finite numbers or {', '.join(ANCHORS)}")
+    direc = soldier.get("dir", 1)
+    if not isinstance(direc, int) or isinstance(direc, bool) or direc not in (1, -1):
+        fail("dir must be 1 or -1")
+
+
+def is_number(value):
+    # JSON true and false are bool, an int subclass. NaN and Infinity are
+    # parsed too, they would stall the timeline
+    return (
+        isinstance(value, Real) and not isinstance(value, bool) and math.isfinite(value)
+    )
+
+
+# Compilation
+
+
+def position(coords):
+    x, y = (ANCHORS.get(c, c) for c in coords)
+    return v2(x, y)
+
+
+def compile_pack(data, path):
+    validate(data, path)
+    troops = {
+        name: [compile_soldier(soldier) for soldier in soldiers]
+        for name, soldiers in data["troops"].items()
+    }
+    return tuple(compile_wave(wave, troops) for wave in data["waves"])
+
+
+def compile_soldier(soldier):
+    """Delay, enemy class and its factory"""
+    enemy = Enemy.types[soldier["enemy"]]
+    fields = {
+        field: position(value) if field in ("pos", "destination") else value
+        for field, value in soldier.items()
+        if field not in ("enemy", "delay")
+    }
+    return soldier["delay"], enemy, enemy.factory(fields)
+
+
+def compile_wave(wave, troops):
+    """Spawn events of a wave, offset from its start by the summed delays"""
+    events = []
+    types = {}  # Ordered set
+    offset = 0
+    for name in wave:
+        for delay, enemy, create in troops[name]:
+            offset += delay
+            events.append(Spawn(offset, create, enemy.aims))
+            types[enemy] = None
+    return Wave(tuple(events), tuple(types))
@@ -0,0 +1,117 @@
+"""Bullet patterns of the enemies.
+
+A pattern fires its bullets in one call to the enemy bullet field, with
+velocities taken from a table computed once by kind of pattern and speed,
+then shared by every enemy using the same one. Directions follow the
+sprites convention: angle 0 is straight down, v2(0, 1).rotate(angle).
+"""
+
+import math
+
+import numpy as np
+
+from bullets import EnBullet
+
+
+def direction(angle):
+    # Unit vector of v2(0, 1).rotate(angle), angle in degrees
+    a = math.radians(angle)
+    return -math.sin(a), math.cos(a)
+
+
+class Pattern:
+
+    tables = {}  # Key -> velocities (n, 2), shared between the patterns
+
+    @classmethod
+    def table(cls, key, build):
+        """Velocity table of key, build() returning its rows the first time"""
+        table = cls.tables.get(key)
+        if table is None:
+            table = cls.tables[key] = np.array(build(), dtype=float).reshape(-1, 2)
+            table.flags.writeable = False
+        return table
+
+    def __init__(self, speed, col=0):
+        self.speed = speed
+        self.col = col  # 0 = red, 1 = blue, 2 = green
+
+    def emit(self, pos, vels):
+        EnBullet.field.add_many(pos, vels, self.col)
+
+
+class Ring(Pattern):
+    """count bullets spread evenly around the enemy, the first one at the
+    angle offset
+    """
+
+    def __init__(self, count, speed, offset=0, col=0):
+        super().__init__(speed, col)
+        step = 360 / count
+        self.vels = self.table(
+            ("ring", count, offset, speed),
+            lambda: [
+                [c * speed for c in direction(offset + step * a)] for a in range(count)
+            ],
+        )
+
+    def fire(self, pos):
+        self.emit(pos, self.vels)
+
+
+class Cross(Ring):
+    """Four bullets, diagonal or straight"""
+
+    def __init__(self, speed, diagonal=True, col=0):
+        super().__init__(4, speed, offset=45 if diagonal else 0, col=col)
+
+
+class Spiral(Pattern):
+    """One bullet per shot, its direction turning rate times a second.
+    The angles are rounded to steps by turn.
+    """
+
+    def __init__(self, speed, rate=1, steps=64, col=0):
+        super().__init__(speed, col)
+        self.rate = rate
+        self.steps = steps
+        self.vels = self.table(
+            ("spiral", steps, speed),
+            lambda: [
+                [c * speed for c in direction(360 * a / steps)] for a in range(steps)
+            ],
+        )
+
+    def fire(self, pos, elapsed):
+        """elapsed: time since the start of the spiral"""
+        i = round(elapsed * self.rate * self.steps) % self.steps
+        self.emit(pos, self.vels[i : i + 1])
+
+
+class AimedFan(Pattern):
+    """count bullets toward a target, spread over the angle spread"""
+
+    def __init__(self, count, speed, spread=0, col=0):
+        super().__init__(speed, col)
+        # Rotations from the aim, scaled by the speed: (cos, sin) * speed
+        start = -spread / 2
+        step = spread / (count - 1) if count > 1 else 0
+        self.rotations = self.table(
+            ("fan", count, spread, speed),
+            lambda: [
+                [
+                    math.cos(math.radians(start + step * a)) * speed,
+                    math.sin(math.radians(start + step * a)) * speed,
+                ]
+                for a in range(count)
+            ],
+        )
+
+    def fire(self, pos, target):
+        dx = target.x - pos.x
+        dy = target.y - pos.y
+        d = math.hypot(dx, dy) or 1
+        ux, uy = dx / d, dy / d
+        c = self.rotations[:, 0]
+        s = self.rotations[:, 1]
+        self.emit(pos, np.column_stack((c * ux - s * uy, s * ux + c * uy)))
@@ -0,0 +1,90 @@
+"""Pools of recycled instances, for the short lived game objects.
+
+A pooled class declares `pool = Pool(size)` and inherits Pooled: calling
+the class takes an instance from its pool, __init__ runs as usual on it,
+and release() gives it back once it has left the game. Released instances
+are only reused after recycle_all(), at the frame boundary: objects still
+seen during the frame are never reinitialized under its feet.
+"""
+
+
+class Pool:
+
+    pools = []
+
+    @classmethod
+    def prewarm_all(cls):
+        for pool in cls.pools:
+            pool.prewarm()
+
+    @classmethod
+    def recycle_all(cls):
+        for pool in cls.pools:
+            if pool.released:
+                pool.recycle()
+
+    @classmethod
+    def stats(cls):
+        """Pool name -> hits, misses, high water of the live instances"""
+        return {
+            pool.cls.__name__: {
+                "hits": pool.hits,
+                "misses": pool.misses,
+                "high_water": pool.high_water,
+            }
+            for pool in cls.pools
+        }
+
+    def __init__(self, size):
+        self.size = size  # Free instances kept at most
+        self.cls = None
+        self.free = []
+        self.released = []  # Reusable from the next frame
+        self.live = 0
+        self.hits = 0
+        self.misses = 0
+        self.high_water = 0
+        self.pools.append(self)
+
+    def __set_name__(self, owner, name):
+        self.cls = owner
+
+    def prewarm(self):
+        while len(self.free) < self.size:
+            self.free.append(object.__new__(self.cls))
+
+    def acquire(self):
+        self.live += 1
+        if self.live > self.high_water:
+            self.high_water = self.live
+        if self.free:
+            self.hits += 1
+            return self.free.pop()
+        self.misses += 1
+        return object.__new__(self.cls)
+
+    def release(self, item):
+        self.live -= 1
+        self.released.append(item)
+
+    def recycle(self):
+        room = self.size - len(self.free)
+        self.free.extend(self.released[:room])
+        self.released.clear()
+
+
+class Pooled:
+    """Instances come from the pool of their own class, if it has one"""
+
+    __slots__ = ()
+
+    def __new__(cls, *args, **kwargs):
+        pool = cls.__dict__.get("pool")
+        if pool is None:
+            return super().__new__(cls)
+        return pool.acquire()
+
+    def release(self):
+        pool = type(self).__dict__.get("pool")
+        if pool is not None:
+            pool.release(self)
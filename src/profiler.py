@@ -0,0 +1,127 @@
+"""Frame timing instrumentation.
+
+Sections of the frame (updates by class, collisions, spawn, layer draws)
+are timed in milliseconds into fixed size ring buffers, with the live
+entity counts. The overlay shows p50 / p99 / max of each section.
+
+Disabled, which is the default, a timed function costs one flag test.
+"""
+
+from functools import wraps
+from time import perf_counter
+
+import numpy as np
+
+import backend as px
+from constants import PROFILE_FRAMES, BLACK, WHITE, GREY, YELLOW
+
+
+class RingBuffer:
+    """The last size values"""
+
+    def __init__(self, size=PROFILE_FRAMES):
+        self.values = np.zeros(size)
+        self.size = size
+        self.index = 0
+        self.count = 0
+
+    def add(self, value):
+        self.values[self.index] = value
+        self.index = (self.index + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def stats(self):
+        """p50, p99, max"""
+        values = self.values[: self.count]
+        p50, p99 = np.percentile(values, (50, 99))
+        return p50, p99, values.max()
+
+
+class Profiler:
+
+    enabled = False
+    sections = {}  # Name -> RingBuffer of milliseconds per frame
+    frame = {}  # Name -> seconds spent in the current frame
+    counts = {}  # Name -> live count at the last frame
+    last_frame = None
+    stats = []  # Overlay lines, refreshed every REFRESH frames
+    REFRESH = 15
+    frames = 0
+
+    @classmethod
+    def toggle(cls):
+        cls.enabled = not cls.enabled
+        cls.sections.clear()
+        cls.frame.clear()
+        cls.stats = []
+        cls.last_frame = None
+
+    @classmethod
+    def add(cls, name, seconds):
+        cls.frame[name] = cls.frame.get(name, 0) + seconds
+
+    @classmethod
+    def update_all(cls, updatables, dt, t):
+        # Timed per class of updatable
+        frame = cls.frame
+        total = perf_counter()
+        for item in updatables:
+            start = perf_counter()
+            item.update(dt, t)
+            name = type(item).__name__
+            frame[name] = frame.get(name, 0) + perf_counter() - start
+        cls.add("update", perf_counter() - total)
+
+    @classmethod
+    def end_frame(cls, counts):
+        """Push the frame timings, sections not seen this frame took 0 ms"""
+        t = perf_counter()
+        if cls.last_frame is not None:
+            cls.add("frame", t - cls.last_frame)
+        cls.last_frame = t
+        for name in cls.frame.keys() - cls.sections.keys():
+            cls.sections[name] = RingBuffer()
+        for name, buffer in cls.sections.items():
+            buffer.add(cls.frame.get(name, 0) * 1000)
+        cls.frame.clear()
+        cls.counts = counts
+
+        cls.frames += 1
+        if cls.frames % cls.REFRESH == 0:
+            cls.refresh()
+
+    @classmethod
+    def refresh(cls):
+        # Slowest sections first
+        stats = [(name, *buffer.stats()) for name, buffer in cls.sections.items()]
+        cls.stats = sorted(stats, key=lambda s: s[2], reverse=True)
+
+    @classmethod
+    def draw(cls, x=2, y=10):
+        lines = [f"{'ms':<16} p50  p99  max"]
+        for name, p50, p99, max_ in cls.stats:
+            lines.append(f"{name[:16]:<16}{p50:>5.2f}{p99:>5.2f}{max_:>5.2f}")
+        lines.append(" ".join(f"{k}:{v}" for k, v in cls.counts.items()))
+        lines = lines[: 100 // 6]  # Fit in the screen
+        px.rect(x - 1, y - 1, 4 * max(map(len, lines)) + 1, len(lines) * 6 + 1, BLACK)
+        for n, line in enumerate(lines):
+            col = YELLOW if n == 0 else GREY if n == len(lines) - 1 else WHITE
+            px.text(x, y + n * 6, line, col)
+
+
+def timed(name):
+    """Decorator, to time the calls of a function as the name section"""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not Profiler.enabled:
+                return func(*args, **kwargs)
+            start = perf_counter()
+            result = func(*args, **kwargs)
+            Profiler.add(name, perf_counter() - start)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,61 @@
+"""Adaptive visual quality, driven by the measured frame time.
+
+Only optional visual work is scaled down: gameplay entities and collisions
+never depend on the quality level.
+"""
+
+import logging
+from collections import deque
+
+from constants import QUALITY_WINDOW, QUALITY_DOWN_MS, QUALITY_UP_MS
+
+log = logging.getLogger(__name__)
+
+# From full quality down
+LEVELS = (
+    {"stars": 50, "explosion": 1.0, "shake": 1.0, "flash_circles": True, "trail": 150},
+    {"stars": 35, "explosion": 0.6, "shake": 0.6, "flash_circles": True, "trail": 90},
+    {"stars": 20, "explosion": 0.35, "shake": 0.3, "flash_circles": False, "trail": 40},
+)
+
+
+class Quality:
+    """Rolling average of the frame times, with hysteresis: the level goes
+    down above QUALITY_DOWN_MS, up below QUALITY_UP_MS, and the window is
+    filled again after each change before the next one.
+    """
+
+    level = 0
+    settings = LEVELS[0]
+    frame_times = deque(maxlen=QUALITY_WINDOW)
+
+    @classmethod
+    def reset(cls):
+        cls.level = 0
+        cls.settings = LEVELS[0]
+        cls.frame_times.clear()
+
+    @classmethod
+    def frame(cls, elapsed):
+        """Record the work time of a frame, in seconds"""
+        times = cls.frame_times
+        times.append(elapsed * 1000)
+        if len(times) < times.maxlen:
+            return
+        average = sum(times) / len(times)
+        if average > QUALITY_DOWN_MS and cls.level < len(LEVELS) - 1:
+            cls.set_level(cls.level + 1, average)
+        elif average < QUALITY_UP_MS and cls.level > 0:
+            cls.set_level(cls.level - 1, average)
+
+    @classmethod
+    def set_level(cls, level, average=None):
+        log.info(
+            "quality level %d -> %d, frame time %s ms",
+            cls.level,
+            level,
+            "?" if average is None else f"{average:.1f}",
+        )
+        cls.level = level
+        cls.settings = LEVELS[level]
+        cls.frame_times.clear()
@@ -1,10 +1,10 @@
 from os.path import join as path_join
-from os import environ, makedirs
 
 import shelve
 
-import pyxel as px
+import backend as px
 from constants import WHITE, BROWN, PURPLE, RED, PINK, SCORE_FILE
+from utils import config_path
 
 
 def static_init(cls):
@@ -19,17 +19,11 @@ class ScoresHandler:
     hiscores = []
     is_new = False
     scores_file = ""
+    version = 0  # Changes with the scores, for the drawings cached
 
     @classmethod
     def init(cls):
-        config_path = path_join(
-            environ.get("APPDATA")  # Windows
-            or environ.get("XDG_CONFIG_HOME")  # Linux/macos XDG spec.
-            or path_join(environ.get("HOME"), ".config"),  # fallback
-            "lastspacefighter",
-        )
-        makedirs(config_path, exist_ok=True)
-        cls.scores_file = path_join(config_path, SCORE_FILE)
+        cls.scores_file = path_join(config_path(), SCORE_FILE)
         cls.hiscores = cls.load()
 
     @classmethod
@@ -54,6 +48,7 @@ class ScoresHandler:
 
     @classmethod
     def update(cls, score):
+        cls.version += 1
         cls.score = score
         if score > min(cls.hiscores):
             cls.is_new = True
@@ -84,26 +79,27 @@ class ScoresHandler:
         print("\n".join(txts))
 
     @classmethod
-    def draw(cls, pos, for_end=False):
+    def draw(cls, pos, for_end=False, screen=px):
+        """Draw on the screen, or on the image given as screen"""
         cw = 4  # caracter width
         lh = 6  # line height
         col_title_score = PINK if for_end else PURPLE
         posx = pos.x
         posy = pos.y
 
-        px.text(posx, posy, "HIGH-SCORE", PURPLE)
+        screen.text(posx, posy, "HIGH-SCORE", PURPLE)
 
         done = False
         for n, sc in enumerate(cls.hiscores):
             y = posy + (5 - n) * 6
-            px.text(posx, y, f"{5-n}- ", BROWN)
-            px.text(posx + 3 * cw, y, str(sc).rjust(7), WHITE)
+            screen.text(posx, y, f"{5-n}- ", BROWN)
+            screen.text(posx + 3 * cw, y, str(sc).rjust(7), WHITE)
             if cls.is_new and sc == cls.score and not done:
-                px.text(posx + 10 * cw, y, " < NEW", RED)
+                screen.text(posx + 10 * cw, y, " < NEW", RED)
                 done = True
         posy += lh * 6
 
-        px.text(posx, posy, "LAST SCORE", col_title_score)
+        screen.text(posx, posy, "LAST SCORE", col_title_score)
         posy += lh
 
-        px.text(posx, posy, str(cls.score).rjust(10), WHITE)
+        screen.text(posx, posy, str(cls.score).rjust(10), WHITE)
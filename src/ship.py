@@ -1,6 +1,6 @@
-from time import time
+from clock import now
 
-import pyxel as px
+import backend as px
 
 from constants import (
     WIDTH,
@@ -14,11 +14,12 @@ from constants import (
     BLUE,
     YELLOW,
 )
-from vector import Vector as v2
-from base import Image, Sprite, Entity, Updatable, Drawable, Layer
+from vector import Vec2 as v2
+from atlas import FRAMES
+from base import Sprite, Updatable, Drawable, Layer
 from bullets import Bullet
 from gfx import HitEffect, HitFlash, BigExplosion
-from utils import Delay
+from utils import Scheduler
 
 
 class Ship(Sprite, Updatable, Drawable):
@@ -27,8 +28,7 @@ class Ship(Sprite, Updatable, Drawable):
     STARTING_POS = v2(WIDTH / 2, HEIGHT - 8)
 
     def __init__(self, pos=STARTING_POS):
-        image = Image(0, 0, 9, 7)
-        super().__init__(pos, image)
+        super().__init__(pos, FRAMES["ship"])
         self.shield = False
         self.shield_start = 0
         self.shield_duration = self.shield_remaining = 3
@@ -36,12 +36,12 @@ class Ship(Sprite, Updatable, Drawable):
         self.speed = 80
         self.acc = 0
         self.vel = 0
-        self.last_time_shoot = time()
+        self.last_time_shoot = now()
         self.alive = True
 
     def activate(self):
         # Activation of the ship at the beginning of a game
-        self.pos = self.STARTING_POS
+        self.pos = self.STARTING_POS.copy()
         self.alive = True
         self.set_draw_layer(Layer.main)
         self.start_update()
@@ -53,7 +53,7 @@ class Ship(Sprite, Updatable, Drawable):
 
     def protect(self):
         self.shield = True
-        self.shield_start = time()
+        self.shield_start = now()
 
     def exiting(self, dt):
         self.vel += self.acc
@@ -67,8 +67,8 @@ class Ship(Sprite, Updatable, Drawable):
         self.deactivate()
         hit_pos = self.pos
         HitEffect(hit_pos, color=YELLOW)
-        Delay(lambda: HitFlash(hit_pos, color=YELLOW), delay=1.25)
-        Delay(lambda: BigExplosion(hit_pos), delay=1.25)
+        Scheduler.schedule(lambda: HitFlash(hit_pos, color=YELLOW), delay=1.25)
+        Scheduler.schedule(lambda: BigExplosion(hit_pos), delay=1.25)
 
     def update(self, dt, t):
         # Move directions
@@ -90,7 +90,7 @@ class Ship(Sprite, Updatable, Drawable):
 
         # Normal move
         if dir_x != 0 or dir_y != 0:
-            self.vel = v2(dir_x, dir_y).normalize() * self.speed
+            self.vel = v2(dir_x, dir_y).normalize_scale(self.speed)
             self.pos += self.vel * dt
             self.pos = self.pos.clamp(v2(4, 4), v2(WIDTH - 4, HEIGHT - 4))
 
@@ -104,8 +104,8 @@ class Ship(Sprite, Updatable, Drawable):
         super().draw()
         if self.shield:
             # shield
-            pos = self.pos + v2(-0.5, -0.5) + Entity.offset
-            phase = int(time() * 10 % 3)
+            pos = self.pos + v2(-0.5, -0.5)
+            phase = int(now() * 10 % 3)
             px.circb(*pos, self.radius + 2 + phase, Ship.shield_colors[phase])
             # remaining countdown
             pos = pos + v2(0, -(self.radius + 10))
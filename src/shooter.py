@@ -3,23 +3,30 @@
 #
 # Author : yuiio@sotodesign.org
 
+import argparse
+import logging
 from os.path import join as path_join
-from time import time
+from time import perf_counter
 
-import pyxel as px
+import backend as px
 
 from constants import *
+import clock
+from profiler import Profiler
+from quality import Quality
 from game import Game
 
 
 class App:
-    def __init__(self):
+    def __init__(self, levels=LEVEL_PACK):
         px.init(WIDTH, HEIGHT, title="The last space fighter", capture_sec=0)
         px.load(path_join("assets", "shooter.pyxres"))
         px.fullscreen(True)
 
-        self.pt = time()  # Buffer previous time
-        self.game = Game()
+        self.clock = clock.Clock()
+        clock.use(self.clock)
+        self.pt = perf_counter()  # Buffer previous real time
+        self.game = Game(levels)
         self.paused = False
 
         px.mouse(SHOW_CURSOR)
@@ -33,21 +40,31 @@ class App:
             if not self.paused:
                 px.stop()
             else:
-                self.pt = time()
+                self.pt = perf_counter()
                 px.playm(3, loop=True)
             self.paused = not self.paused
+        if px.btnp(px.KEY_F1):
+            Profiler.toggle()
 
         if not self.paused:
-            t = time()
-            dt = t - self.pt
+            t = perf_counter()
+            # Fixed steps on the simulation clock, whatever the real time
+            for _ in range(self.clock.tick(t - self.pt)):
+                self.clock.advance()
+                self.game.step(self.clock.step, self.clock.t)
             self.pt = t
 
-            self.game.state.update(dt, t)
-            self.game.state = self.game.state.get_next_state()
-
     def draw(self):
         if not self.paused:
             self.game.state.draw()
+            # Work time of the frame, since the start of update
+            Quality.frame(perf_counter() - self.pt)
+
 
+parser = argparse.ArgumentParser(description="The last space fighter")
+parser.add_argument("--levels", default=LEVEL_PACK, help="level pack name")
+args = parser.parse_args()
 
-App()
+logging.basicConfig(level=logging.INFO)
+px.use(px.PyxelBackend())
+App(args.levels)
@@ -0,0 +1,236 @@
+"""Parametric trajectories of the enemies.
+
+A trajectory is a movement pattern in closed form: the position is a
+function of the time elapsed since the enemy start, and of a few
+parameters of the enemy (its start position, its direction ...). The
+enemies following a trajectory are rows of arrays, all of them are moved
+by one vectorized evaluation per frame in update_all(). The position at
+any other time, past or future, is given by path() and position_at(),
+for aim prediction or offline analysis.
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from vector import Vec2 as v2
+from profiler import timed
+
+
+class Trajectory(ABC):
+
+    trajectories = []
+    params = ("x", "y")  # By enemy, the start position at least
+
+    @classmethod
+    @timed("trajectories")
+    def update_all(cls, t):
+        for trajectory in cls.trajectories:
+            if trajectory.members:
+                trajectory.update(t)
+
+    @classmethod
+    def clear_all(cls):
+        for trajectory in cls.trajectories:
+            trajectory.clear()
+
+    def __init__(self, capacity=16):
+        self.members = []  # Enemies, by row
+        self.rows = {}  # Enemy -> row
+        self.start = np.zeros(capacity)
+        self.data = np.zeros((capacity, len(self.params)))
+        self.trajectories.append(self)
+
+    def __len__(self):
+        return len(self.members)
+
+    def add(self, enemy, start, **params):
+        """enemy follows the trajectory from the time start"""
+        n = len(self.members)
+        if n == len(self.start):
+            self.grow()
+        self.rows[enemy] = n
+        self.members.append(enemy)
+        self.start[n] = start
+        self.data[n] = [params[name] for name in self.params]
+
+    def grow(self):
+        n = len(self.start)
+        start = np.zeros(n * 2)
+        start[:n] = self.start
+        data = np.zeros((n * 2, len(self.params)))
+        data[:n] = self.data
+        self.start, self.data = start, data
+
+    def remove(self, enemy):
+        # The last row moves to the freed one
+        row = self.rows.pop(enemy)
+        last = self.members.pop()
+        if last is not enemy:
+            n = len(self.members)
+            self.members[row] = last
+            self.rows[last] = row
+            self.start[row] = self.start[n]
+            self.data[row] = self.data[n]
+
+    def clear(self):
+        self.members.clear()
+        self.rows.clear()
+
+    def update(self, t):
+        n = len(self.members)
+        xy = self.curve(t - self.start[:n], self.data[:n], self.members)
+        for enemy, (x, y) in zip(self.members, xy.tolist()):
+            pos = enemy.pos
+            pos.x = x
+            pos.y = y
+
+    def path(self, enemy, times):
+        """Positions of enemy at the given times, as an array (n, 2)"""
+        row = self.rows[enemy]
+        elapsed = np.asarray(times, dtype=float).reshape(-1) - self.start[row]
+        n = len(elapsed)
+        data = np.broadcast_to(self.data[row], (n, len(self.params)))
+        return self.curve(elapsed, data, [enemy] * n)
+
+    def position_at(self, enemy, t):
+        x, y = self.path(enemy, t)[0]
+        return v2(x, y)
+
+    @abstractmethod
+    def curve(self, elapsed, data, members):
+        """Positions (n, 2) after the elapsed times (n,), for the rows of
+        parameters data (n, len(params)) of the members enemies
+        """
+        pass
+
+
+class Sway(Trajectory):
+    """Straight down, swaying from side to side"""
+
+    def __init__(self, speed, amplitude, freq):
+        super().__init__()
+        self.speed = speed
+        self.amplitude = amplitude
+        self.freq = freq
+
+    def curve(self, elapsed, data, members):
+        x = data[:, 0] + np.cos(elapsed * self.freq) * self.amplitude
+        y = data[:, 1] + elapsed * self.speed
+        return np.column_stack((x, y))
+
+
+class Loops(Trajectory):
+    """Circles around a drifting center, mirrored by dir (1 or -1)"""
+
+    params = ("x", "y", "dir")
+
+    def __init__(self, drift, radius, freq):
+        super().__init__()
+        self.drift = drift
+        self.radius = radius
+        self.freq = freq
+
+    def curve(self, elapsed, data, members):
+        angle = elapsed * self.freq
+        dx = self.drift.x * elapsed + np.cos(angle) * self.radius
+        x = data[:, 0] + dx * data[:, 2]
+        y = data[:, 1] + self.drift.y * elapsed + np.sin(angle) * self.radius
+        return np.column_stack((x, y))
+
+
+class Swing(Trajectory):
+    """Pendulum arcs drifting down, their height shrinking with time"""
+
+    def __init__(self, speed, half_width, half_height, shrink, freq, phase=0):
+        super().__init__()
+        self.speed = speed
+        self.half_width = half_width
+        self.half_height = half_height
+        self.shrink = shrink  # Of the half height, by second
+        self.freq = freq
+        self.phase = phase  # Time, added to the elapsed one for the arcs
+
+    def curve(self, elapsed, data, members):
+        ti = elapsed + self.phase
+        height = self.half_height - self.shrink * elapsed
+        x = data[:, 0] + np.sin(ti * self.freq) * self.half_width
+        y = data[:, 1] + self.speed * elapsed + np.cos(ti * self.freq * 2) * height
+        return np.column_stack((x, y))
+
+
+class Orbit(Trajectory):
+    """Circle around an anchor entity, following it. The anchor is where it
+    is now for path(): its own future moves are not known.
+    """
+
+    params = ("angle",)  # At the start
+
+    def __init__(self, radius, speed):
+        super().__init__()
+        self.radius = radius
+        self.speed = speed  # Angular, in radians/s
+        self.anchors = {}  # Enemy -> anchor entity
+
+    def add(self, enemy, start, anchor, **params):
+        self.anchors[enemy] = anchor
+        super().add(enemy, start, **params)
+
+    def remove(self, enemy):
+        del self.anchors[enemy]
+        super().remove(enemy)
+
+    def clear(self):
+        self.anchors.clear()
+        super().clear()
+
+    def curve(self, elapsed, data, members):
+        anchors = [self.anchors[enemy].pos for enemy in members]
+        cx = np.fromiter((pos.x for pos in anchors), float, len(anchors))
+        cy = np.fromiter((pos.y for pos in anchors), float, len(anchors))
+        angle = data[:, 0] + elapsed * self.speed
+        x = cx + np.cos(angle) * self.radius
+        y = cy + np.sin(angle) * self.radius
+        return np.column_stack((x, y))
+
+
+class PingPong(Trajectory):
+    """Back and forth between the start and a destination"""
+
+    params = ("x", "y", "x1", "y1")
+
+    def __init__(self, speed):
+        super().__init__()
+        self.speed = speed
+
+    def curve(self, elapsed, data, members):
+        start = data[:, 0:2]
+        delta = data[:, 2:4] - start
+        length = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 1e-9)
+        s = (elapsed * self.speed) % (2 * length)
+        along = np.where(s < length, s, 2 * length - s) / length
+        return start + delta * along[:, None]
+
+
+class Legs(Trajectory):
+    """Straight legs at constant speed, repeated, x mirrored by dir"""
+
+    params = ("x", "y", "dir")
+
+    def __init__(self, legs, speed):
+        """legs: (direction, length) pairs, directions of norm 1"""
+        super().__init__()
+        self.speed = speed
+        self.dirs = np.array([(d.x, d.y) for d, _ in legs], dtype=float)
+        self.lengths = np.array([length for _, length in legs], dtype=float)
+        self.starts = np.cumsum(self.lengths) - self.lengths
+        self.cycle = self.lengths.sum()
+        self.net = self.dirs.T @ self.lengths  # Move of a whole cycle
+
+    def curve(self, elapsed, data, members):
+        cycles, rest = np.divmod(elapsed * self.speed, self.cycle)
+        along = np.clip(rest[:, None] - self.starts, 0, self.lengths)
+        move = cycles[:, None] * self.net + along @ self.dirs
+        x = data[:, 0] + move[:, 0] * data[:, 2]
+        y = data[:, 1] + move[:, 1]
+        return np.column_stack((x, y))
@@ -1,21 +1,87 @@
-from time import time
+import heapq
+from os import environ, makedirs
+from os.path import join as path_join
+
 from constants import WIDTH
 from base import Updatable
+from clock import now
+
+
+def config_path():
+    """Directory of the game files: scores, caches"""
+    path = path_join(
+        environ.get("APPDATA")  # Windows
+        or environ.get("XDG_CONFIG_HOME")  # Linux/macos XDG spec.
+        or path_join(environ.get("HOME"), ".config"),  # fallback
+        "lastspacefighter",
+    )
+    makedirs(path, exist_ok=True)
+    return path
+
+
+class Timer:
+    """Handle on a call planned by the Scheduler"""
+
+    __slots__ = ("func", "repeat", "owner", "cancelled")
+
+    def __init__(self, func, repeat=None, owner=None):
+        self.func = func
+        self.repeat = repeat
+        self.owner = owner
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Scheduler:
+    """To launch functions after a delay, on the simulation time.
+
+    Timers wait in a heap ordered by due time, run() is called once per
+    frame by the game loop and only touches the due ones: the cost is
+    O(fired) per frame, not O(pending).
+    """
+
+    timers = []  # Heap of (due time, sequence, timer)
+    sequence = 0  # Keeps timers due at the same time in planning order
 
+    @classmethod
+    def schedule(cls, func, delay=0, repeat=None, owner=None):
+        """Call func in delay seconds, then every repeat seconds if given.
+        A timer bound to an owner is dropped when the owner stops updating.
+        """
+        if repeat is not None and repeat <= 0:
+            raise ValueError(f"repeat must be positive, not {repeat}")
+        timer = Timer(func, repeat, owner)
+        cls.push(now() + delay, timer)
+        return timer
 
-class Delay(Updatable):
-    """To launch function after a delay"""
+    @classmethod
+    def push(cls, when, timer):
+        heapq.heappush(cls.timers, (when, cls.sequence, timer))
+        cls.sequence += 1
 
-    def __init__(self, func, delay=0):
-        self.updatables.append(self)
-        self.start = time() + delay
-        self.to_run = func
+    @classmethod
+    def run(cls, t):
+        timers = cls.timers
+        while timers and timers[0][0] <= t:
+            when, _, timer = heapq.heappop(timers)
+            if timer.cancelled:
+                continue
+            if timer.owner is not None and timer.owner not in Updatable.updatables:
+                timer.cancel()
+                continue
+            if timer.repeat:
+                cls.push(when + timer.repeat, timer)
+            else:
+                timer.cancelled = True  # Done
+            timer.func()
 
-    def update(self, dt, t):
-        if t >= self.start:
-            self.to_run()
-            self.updatables.remove(self)
-            del self
+    @classmethod
+    def clear(cls):
+        for _, _, timer in cls.timers:
+            timer.cancel()
+        cls.timers.clear()
 
 
 def map_range(value, in_min, in_max, out_min, out_max):